@@ -0,0 +1,148 @@
+# app/cli.py
+#
+# Maintenance commands that run outside the web server, e.g.
+#   python -m app.cli import client clients.csv
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from app.utils.commission import close_commissions, month_range
+from app.utils.db.associate import backfill_associate_name_keys
+from app.utils.db.client import backfill_client_name_keys
+from app.utils.db.indexes import report_indexes
+from app.utils.db.order import OPEN_ORDER_STATUSES, recompute_order_totals
+from app.utils.importer import IMPORT_CHUNK_SIZE, SCHEMAS, import_records
+from app.utils.prisma import connect_prisma, disconnect_prisma
+
+READ_CHUNK_BYTES = 64 * 1024
+
+
+async def read_chunks(path: str):
+    stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+    try:
+        while chunk := stream.read(READ_CHUNK_BYTES):
+            yield chunk
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+
+async def cmd_import(args) -> int:
+    fmt = args.format or ("csv" if Path(args.file).suffix.lower() == ".csv" else
+                          "ndjson")
+    report = {}
+    async for report in import_records(args.model,
+                                       fmt,
+                                       read_chunks(args.file),
+                                       chunk_size=args.chunk_size):
+        if not report["done"]:
+            print(
+                f"{report['rows']} rows, {report['created']} created, "
+                f"{report['failed']} failed ({report['rows_per_s']} rows/s)",
+                file=sys.stderr,
+            )
+    print(json.dumps(report, indent=2))
+    return 1 if report.get("failed") else 0
+
+
+async def cmd_recompute_totals(args) -> int:
+    where = {} if args.all_statuses else {"status": {"in": OPEN_ORDER_STATUSES}}
+    if args.product:
+        where["lineitems"] = {"some": {"product_id": args.product}}
+    result = await recompute_order_totals(where)
+    if "failure" in result:
+        print(result["failure"]["msg"], file=sys.stderr)
+        return 1
+    print(json.dumps(result["success"]))
+    return 0
+
+
+async def cmd_close_commissions(args) -> int:
+    start, end = month_range(args.month)
+    result = await close_commissions(
+        {"created_at": {"gte": start, "lt": end}}, dry_run=args.dry_run)
+    if "failure" in result:
+        print(result["failure"]["msg"], file=sys.stderr)
+        return 1
+    print(json.dumps(result["success"], indent=2))
+    return 0
+
+
+async def cmd_verify_indexes(args) -> int:
+    return 0 if report_indexes() else 1
+
+
+async def cmd_backfill_name_keys(args) -> int:
+    results = {}
+    for model, backfill in (("client", backfill_client_name_keys),
+                            ("associate", backfill_associate_name_keys)):
+        result = await backfill()
+        if "failure" in result:
+            print(result["failure"]["msg"], file=sys.stderr)
+            return 1
+        results[model] = result["success"]
+    print(json.dumps(results))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser(
+        "import", help="Bulk import records from a CSV or NDJSON file")
+    importer.add_argument("model", choices=sorted(SCHEMAS))
+    importer.add_argument("file", help="Path to the file, or - for stdin")
+    importer.add_argument("--format", choices=["csv", "ndjson"])
+    importer.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    importer.set_defaults(handler=cmd_import)
+
+    totals = commands.add_parser(
+        "recompute-totals",
+        help="Recompute total_due/transaction_fee/revenue from line items")
+    totals.add_argument("--product", help="Only orders billing this product id")
+    totals.add_argument("--all-statuses",
+                        action="store_true",
+                        help="Include invoiced and settled orders, not just open ones")
+    totals.set_defaults(handler=cmd_recompute_totals)
+
+    commissions = commands.add_parser(
+        "close-commissions",
+        help="Compute commissions and per-associate payouts for a month")
+    commissions.add_argument("month", help="YYYY-MM, by order creation date")
+    commissions.add_argument("--dry-run",
+                             action="store_true",
+                             help="Report payouts without writing orders")
+    commissions.set_defaults(handler=cmd_close_commissions)
+
+    indexes = commands.add_parser(
+        "verify-indexes",
+        help="Explain every db query shape and flag scans or in-memory sorts")
+    indexes.set_defaults(handler=cmd_verify_indexes)
+
+    name_keys = commands.add_parser(
+        "backfill-name-keys",
+        help="Fill the lowercased name copies typeaheads match on")
+    name_keys.set_defaults(handler=cmd_backfill_name_keys)
+
+    return parser
+
+
+async def run(args) -> int:
+    await connect_prisma()
+    try:
+        return await args.handler(args)
+    finally:
+        await disconnect_prisma()
+
+
+def main():
+    args = build_parser().parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,65 @@
 # app/main.py
 
+import asyncio
+
 import uvicorn
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
 from starlette.middleware import Middleware
-from starlette.middleware.sessions import SessionMiddleware
 
+from app.middleware.compression import CompressionMiddleware
 from app.middleware.form_data import FormDataMiddleware
-from app.middleware.password_reset_required import PasswordResetRequiredMiddleware
-from app.middleware.require_auth import AuthRequiredMiddleware
+from app.middleware.loaders import LoaderMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.middleware.read_routing import ReadRoutingMiddleware
+from app.middleware.security_gate import SecurityGateMiddleware
+from app.middleware.sessions import ServerSessionMiddleware
+from app.routes.admin import router as admin_router
+from app.routes.api.typeahead import router as typeahead_router
 from app.routes.auth import router as auth_router
+from app.routes.export import router as export_router
+from app.routes.search import router as search_router
 from app.routes.view.associate import router as associate_view_router
 from app.routes.view.client import router as client_view_router
 from app.routes.view.order import router as order_view_router
 from app.routes.view.product import router as product_view_router
-from app.utils.envars import SESSION_SECRET
+from app.utils.assets import STATIC_URL, StaticAssets, asset_manifest
+from app.utils.db.indexes import report_indexes, require_pymongo
+from app.utils.envars import SESSION_SECRET, VERIFY_INDEXES
 from app.utils.prisma import connect_prisma, disconnect_prisma
+from app.utils.search import search_index
+from app.utils.session_store import create_session_store
 from app.utils.templates import render
 
+session_store = create_session_store()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await connect_prisma()
+    asset_manifest.load()
+    if VERIFY_INDEXES:
+        require_pymongo()
+        await asyncio.to_thread(report_indexes)
+    search_index.start()
     yield
+    await search_index.stop()
     await disconnect_prisma()
+    await session_store.close()
 
 
 middleware = [
-    Middleware(SessionMiddleware, secret_key=SESSION_SECRET),
+    Middleware(CompressionMiddleware),
+    Middleware(QueryStatsMiddleware),
+    Middleware(ServerSessionMiddleware,
+               store=session_store,
+               secret_key=SESSION_SECRET,
+               skip_paths=(STATIC_URL,)),
     Middleware(FormDataMiddleware),
-    Middleware(PasswordResetRequiredMiddleware),
-    Middleware(AuthRequiredMiddleware),
+    Middleware(SecurityGateMiddleware),
+    Middleware(LoaderMiddleware),
+    Middleware(ReadRoutingMiddleware),
 ]
 
 app = FastAPI(
@@ -41,7 +68,7 @@ app = FastAPI(
 )
 
 # Mount static and templates
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+app.mount("/static", StaticAssets(directory="app/static"), name="static")
 
 # API routes
 app.include_router(auth_router)
@@ -49,6 +76,10 @@ app.include_router(associate_view_router)
 app.include_router(client_view_router)
 app.include_router(product_view_router)
 app.include_router(order_view_router)
+app.include_router(admin_router)
+app.include_router(export_router)
+app.include_router(search_router)
+app.include_router(typeahead_router)
 
 
 # Homepage (Jinja2 demo)
@@ -0,0 +1,175 @@
+# app/middleware/compression.py
+#
+# gzip/brotli for responses the app builds itself (pages, JSON, exports).
+# A body that arrives in one message is compressed whole, if it reaches
+# COMPRESSION_MIN_BYTES; a streamed one is compressed chunk by chunk and
+# flushed as it goes. Responses that already carry a Content-Encoding (the
+# precompressed static assets, gzip exports) or whose type is not on the
+# allowlist pass through untouched.
+
+import time
+from typing import Any, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.compression import ENCODINGS, StreamCompressor, choose_encoding, is_compressible
+from app.utils.envars import (
+    COMPRESSION_BROTLI_QUALITY,
+    COMPRESSION_ENCODINGS,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_MIN_BYTES,
+)
+
+LEVELS = {
+    "br": COMPRESSION_BROTLI_QUALITY,
+    "gzip": COMPRESSION_GZIP_LEVEL,
+}
+
+# Configured codings this process can actually produce, preferred first
+ENABLED_ENCODINGS = tuple(encoding
+                          for encoding in map(str.strip, COMPRESSION_ENCODINGS.split(","))
+                          if encoding in ENCODINGS)
+
+# Never have a body, or must not have theirs changed
+SKIP_STATUSES = {204, 206, 304}
+
+
+class CompressionStats:
+    """Bytes in and out, and time spent compressing, per coding."""
+
+    def __init__(self):
+        self.encodings: dict[str, dict[str, float]] = {}
+        self.skipped: dict[str, int] = {}
+
+    def _totals(self, encoding: str) -> dict[str, float]:
+        return self.encodings.setdefault(
+            encoding, {"responses": 0, "bytes_in": 0, "bytes_out": 0, "seconds": 0.0})
+
+    def count(self, encoding: str):
+        self._totals(encoding)["responses"] += 1
+
+    def record(self, encoding: str, bytes_in: int, bytes_out: int, seconds: float):
+        totals = self._totals(encoding)
+        totals["bytes_in"] += bytes_in
+        totals["bytes_out"] += bytes_out
+        totals["seconds"] += seconds
+
+    def skip(self, reason: str):
+        self.skipped[reason] = self.skipped.get(reason, 0) + 1
+
+    def stats(self) -> dict[str, Any]:
+        encodings = {}
+        for encoding, totals in self.encodings.items():
+            mb_in = totals["bytes_in"] / 1_000_000
+            encodings[encoding] = {
+                "level": LEVELS[encoding],
+                "responses": totals["responses"],
+                "bytes_in": totals["bytes_in"],
+                "bytes_out": totals["bytes_out"],
+                "ratio": round(totals["bytes_out"] / totals["bytes_in"], 3)
+                if totals["bytes_in"] else None,
+                "cpu_ms": round(totals["seconds"] * 1000, 1),
+                "cpu_ms_per_mb": round(totals["seconds"] * 1000 / mb_in, 2)
+                if mb_in else None,
+            }
+        return {
+            "enabled": list(ENABLED_ENCODINGS),
+            "min_bytes": COMPRESSION_MIN_BYTES,
+            "encodings": encodings,
+            "skipped": dict(self.skipped),
+        }
+
+
+compression_stats = CompressionStats()
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not ENABLED_ENCODINGS:
+            await self.app(scope, receive, send)
+            return
+
+        accept = Headers(scope=scope).get("accept-encoding", "")
+        encoding = choose_encoding(accept, ENABLED_ENCODINGS)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        compressor: Optional[StreamCompressor] = None
+        passthrough = False
+
+        def compress(data: bytes, last: bool) -> bytes:
+            started = time.perf_counter()
+            out = compressor.compress(data, flush=not last) if data else b""
+            if last:
+                out += compressor.finish()
+            compression_stats.record(encoding, len(data), len(out),
+                                     time.perf_counter() - started)
+            return out
+
+        async def send_wrapper(message: Message):
+            nonlocal start, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                reason = None
+                if message["status"] in SKIP_STATUSES or message["status"] < 200:
+                    reason = "status"
+                elif "content-encoding" in headers:
+                    reason = "encoded"
+                elif not is_compressible(headers.get("content-type")):
+                    reason = "type"
+                elif "content-range" in headers:
+                    reason = "range"
+
+                if reason:
+                    compression_stats.skip(reason)
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message  # wait for the first chunk to decide
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                if not more_body and len(body) < COMPRESSION_MIN_BYTES:
+                    compression_stats.skip("small")
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                compressor = StreamCompressor(encoding, LEVELS[encoding])
+                compression_stats.count(encoding)
+                headers = MutableHeaders(scope=start)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = "W/" + etag  # no longer byte-for-byte
+                body = compress(body, not more_body)
+                if more_body:
+                    del headers["Content-Length"]  # streamed: length unknown
+                else:
+                    headers["Content-Length"] = str(len(body))
+                await send(start)
+                await send({"type": "http.response.body", "body": body,
+                            "more_body": more_body})
+                return
+
+            await send({"type": "http.response.body",
+                        "body": compress(body, not more_body),
+                        "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
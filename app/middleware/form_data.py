@@ -1,9 +1,18 @@
 # app/middleware/form_data.py
 
 from datetime import datetime
+from typing import Any
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import HTTPException, Request
+from starlette.datastructures import FormData, Headers
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.envars import FORM_MAX_BYTES, FORM_MAX_FIELDS
+
+# Only these bodies are parsed as forms; anything else (e.g. an import's CSV
+# stream) reaches the handler untouched
+FORM_CONTENT_TYPES = ("application/x-www-form-urlencoded", "multipart/form-data")
 
 
 def try_parse_date_like_field(field_name: str, value: str):
@@ -20,23 +29,74 @@ def try_parse_date_like_field(field_name: str, value: str):
         return value
 
 
-class FormDataMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        form = await request.form()
-        parsed_form = {}
+def is_form_post(scope: Scope) -> bool:
+    return (scope["method"] == "POST" and Headers(scope=scope).get(
+        "content-type", "").startswith(FORM_CONTENT_TYPES))
+
+
+def parse_form(form: FormData) -> dict[str, Any]:
+    parsed_form = {}
+
+    for key in form.keys():
+        values = form.getlist(key)
+        processed = [
+            try_parse_date_like_field(key, v) if isinstance(v, str) else v
+            for v in values
+            if v is not None and (not isinstance(v, str) or v.strip())  # Skip empty
+        ]
+
+        if not processed:
+            continue  # Don't include key at all if it's empty
+
+        parsed_form[key] = processed if len(processed) > 1 else processed[0]
+
+    return parsed_form
+
+
+async def get_form(request: Request) -> dict[str, Any]:
+    """
+    The request's parsed form, read on first call and kept on
+    `request.state.form`; `{}` for anything but a form POST.
+    """
+    form = getattr(request.state, "form", None)
+    if form is None:
+        form = {}
+        if is_form_post(request.scope):
+            # Multipart bodies are parsed as they stream in, part by part
+            form = parse_form(await request.form(max_fields=FORM_MAX_FIELDS,
+                                                 max_part_size=FORM_MAX_BYTES))
+        request.state.form = form
+    return form
+
+
+class FormDataMiddleware:
+    """
+    Caps form POST bodies at FORM_MAX_BYTES. Parsing itself is left to
+    `get_form`, so requests that never read their form pay nothing.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not is_form_post(scope):
+            await self.app(scope, receive, send)
+            return
 
-        for key in form.keys():
-            values = form.getlist(key)
-            processed = [
-                try_parse_date_like_field(key, v)
-                for v in values
-                if v is not None and v.strip()  # Skip empty
-            ]
+        length = Headers(scope=scope).get("content-length", "")
+        if length.isdigit() and int(length) > FORM_MAX_BYTES:
+            response = PlainTextResponse("Form too large", status_code=413)
+            await response(scope, receive, send)
+            return
 
-            if not processed:
-                continue  # Don't include key at all if it's empty
+        received = 0
 
-            parsed_form[key] = processed if len(processed) > 1 else processed[0]
+        async def receive_limited() -> Message:
+            nonlocal received
+            message = await receive()
+            received += len(message.get("body", b""))
+            if received > FORM_MAX_BYTES:  # chunked, or a lying Content-Length
+                raise HTTPException(status_code=413, detail="Form too large")
+            return message
 
-        request.state.form = parsed_form
-        return await call_next(request)
+        await self.app(scope, receive_limited, send)
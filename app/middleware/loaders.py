@@ -0,0 +1,22 @@
+# app/middleware/loaders.py
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.utils.db.loader import reset_loaders, use_loaders
+
+
+class LoaderMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Give each request its own batched, cached id lookups
+        token = use_loaders()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            reset_loaders(token)
@@ -0,0 +1,39 @@
+# app/middleware/query_stats.py
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.db.instrument import get_query_stats, reset_query_stats, use_query_stats
+from app.utils.envars import ENV_MODE
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message):
+            # Query counts and shapes are for developers, not for clients
+            if message["type"] == "http.response.start" and ENV_MODE == "development":
+                stats = get_query_stats()
+                # Streamed bodies query after this point and aren't counted
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Queries"] = str(stats.count)
+                headers["X-DB-Time-ms"] = str(stats.ms)
+
+                repeated = stats.repeated_shapes()
+                if repeated:
+                    headers["X-DB-N-Plus-One"] = str(len(repeated))
+                    for shape, count in repeated.items():
+                        print(f"⚠️ N+1? {count}x {shape} on {scope['path']}")
+            await send(message)
+
+        token = use_query_stats()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            reset_query_stats(token)
@@ -0,0 +1,38 @@
+# app/middleware/read_routing.py
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.db.routing import (
+    WROTE_AT_KEY,
+    reset_read_routing,
+    use_read_routing,
+    wrote_this_request,
+)
+
+
+class ReadRoutingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # Static files never query, so don't load their session
+        if scope["type"] != "http" or scope["path"].startswith("/static"):
+            await self.app(scope, receive, send)
+            return
+
+        session = scope["session"]
+
+        async def send_wrapper(message: Message):
+            # Before the session middleware saves on response start
+            if message["type"] == "http.response.start" and wrote_this_request():
+                session[WROTE_AT_KEY] = time.time()
+            await send(message)
+
+        # Sessions that just wrote keep reading the primary (read-your-writes)
+        token = use_read_routing(session.get(WROTE_AT_KEY))
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            reset_read_routing(token)
@@ -0,0 +1,142 @@
+# app/middleware/security_gate.py
+#
+# One gate for login, forced password reset and role checks. The policy of
+# every registered route is compiled once, at startup, from the decorators
+# in app/utils/security.py (`public`, `reset_exempt`, `require_role`):
+#   - static paths are a single dict lookup by (method, path)
+#   - parameterized paths only walk the routes sharing their first segment
+# Each request then costs one route lookup and one session read.
+
+from typing import Iterable, Optional
+
+from starlette.responses import RedirectResponse
+from starlette.routing import BaseRoute, Mount, Route
+from starlette.staticfiles import StaticFiles
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.utils.envars import AUTH_STATUS
+
+
+class RoutePolicy:
+    __slots__ = ("public", "reset_exempt", "roles")
+
+    def __init__(self,
+                 public: bool = False,
+                 reset_exempt: bool = False,
+                 roles: Optional[frozenset[str]] = None):
+        self.public = public
+        self.reset_exempt = reset_exempt
+        self.roles = roles
+
+    @classmethod
+    def of(cls, route: BaseRoute) -> "RoutePolicy":
+        if isinstance(route, Mount) and isinstance(route.app, StaticFiles):
+            return cls(public=True, reset_exempt=True)
+        endpoint = getattr(route, "endpoint", None)
+        return cls(
+            public=getattr(endpoint, "_public", False),
+            reset_exempt=getattr(endpoint, "_reset_exempt", False),
+            roles=getattr(endpoint, "_required_roles", None),
+        )
+
+
+# Unmatched paths still need a login; the router answers them with a 404
+DEFAULT_POLICY = RoutePolicy()
+
+
+def _first_segment(path: str) -> str:
+    return path[1:].split("/", 1)[0]
+
+
+class RoutePolicyTable:
+
+    def __init__(self, routes: Iterable[BaseRoute]):
+        # (first segment, regex, methods, policy), in the router's order
+        entries = []
+        exact_paths = []
+        for route in routes:
+            if not isinstance(route, (Route, Mount)):
+                continue
+            methods = getattr(route, "methods", None)
+            entries.append((_first_segment(route.path), route.path_regex, methods,
+                            RoutePolicy.of(route)))
+            if isinstance(route, Route) and not route.param_convertors:
+                exact_paths.append((route.path, methods or ()))
+
+        # A route whose first segment is a parameter can match any path
+        self._wildcard = [e[1:] for e in entries if e[0].startswith("{")]
+        self._buckets: dict[str, list] = {}
+        for segment, *_ in entries:
+            if not segment.startswith("{") and segment not in self._buckets:
+                self._buckets[segment] = [e[1:] for e in entries
+                                          if e[0] == segment or e[0].startswith("{")]
+
+        # Resolve static paths up front; a parameterized route declared
+        # earlier can still shadow one
+        self._exact: dict[tuple[str, str], RoutePolicy] = {}
+        for path, methods in exact_paths:
+            for method in methods:
+                self._exact.setdefault((method, path), self._walk(method, path))
+
+    def _walk(self, method: str, path: str) -> RoutePolicy:
+        bucket = self._buckets.get(_first_segment(path), self._wildcard)
+        partial = None
+        for regex, methods, policy in bucket:
+            if regex.match(path):
+                if methods is None or method in methods:
+                    return policy
+                partial = partial or policy  # the router will answer 405
+        return partial or DEFAULT_POLICY
+
+    def lookup(self, method: str, path: str) -> RoutePolicy:
+        policy = self._exact.get((method, path))
+        return policy if policy is not None else self._walk(method, path)
+
+
+class SecurityGateMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.policies: Optional[RoutePolicyTable] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "lifespan":
+            # Every router is included by now
+            self.policies = RoutePolicyTable(scope["app"].routes)
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if self.policies is None:  # served without a lifespan
+            self.policies = RoutePolicyTable(scope["app"].routes)
+        policy = self.policies.lookup(scope["method"], scope["path"])
+
+        # Static assets and the login pages need no checks
+        if policy.public and policy.reset_exempt:
+            await self.app(scope, receive, send)
+            return
+
+        session = scope["session"]
+        id58 = session.get("id58")
+
+        if not policy.reset_exempt and id58 and session.get("must_reset_password"):
+            response = RedirectResponse("/auth/set-password", status_code=303)
+            await response(scope, receive, send)
+            return
+
+        if AUTH_STATUS == "disabled":
+            await self.app(scope, receive, send)
+            return
+
+        if not policy.public and not id58:
+            session["flash"] = ["Please log in to continue."]
+            response = RedirectResponse("/login", status_code=303)
+            await response(scope, receive, send)
+            return
+
+        if policy.roles is not None and policy.roles.isdisjoint(session.get("roles", [])):
+            session["flash"] = ["Access denied."]
+            response = RedirectResponse("/", status_code=303)
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
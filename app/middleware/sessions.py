@@ -0,0 +1,162 @@
+# app/middleware/sessions.py
+
+import secrets
+import time
+from collections.abc import MutableMapping
+from typing import Any, Iterator, Optional
+
+from itsdangerous import BadSignature, TimestampSigner
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.envars import SESSION_HTTPS_ONLY, SESSION_MAX_AGE, SESSION_REFRESH_SECONDS
+from app.utils.session_store import SessionStore
+
+
+class ServerSession(MutableMapping):
+    """
+    `request.session` backed by a `SessionStore`. The middleware loads the
+    data before the app runs, so access is plain dict access, and writes it
+    back only if it changed.
+    """
+
+    def __init__(self, sid: Optional[str]):
+        self.sid = sid
+        self.data: dict = {}
+        self.modified = False
+        self.rotate = False
+        # the store's TTL and the cookie are due to be pushed out
+        self.refresh = False
+
+    def __getitem__(self, key: str) -> Any:
+        return self.data[key]
+
+    def __setitem__(self, key: str, value: Any):
+        self.data[key] = value
+        self.modified = True
+
+    def __delitem__(self, key: str):
+        del self.data[key]
+        self.modified = True
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def clear(self):
+        self.data = {}
+        self.modified = True
+        self.rotate = True
+
+    def regenerate(self):
+        """Keep the data under a new session id, e.g. on login."""
+        self.modified = True
+        self.rotate = True
+
+
+class ServerSessionMiddleware:
+    """
+    Drop-in for Starlette's `SessionMiddleware` that keeps session data in
+    a `SessionStore` and only a signed session id in the cookie. Expiry
+    slides: a session in use has its TTL and cookie pushed out once every
+    `refresh_after` seconds, even when unchanged. Paths under `skip_paths`
+    (static assets) get an empty session and never touch the store.
+    """
+
+    def __init__(self,
+                 app: ASGIApp,
+                 store: SessionStore,
+                 secret_key: str,
+                 session_cookie: str = "session",
+                 max_age: int = SESSION_MAX_AGE,
+                 refresh_after: int = SESSION_REFRESH_SECONDS,
+                 https_only: bool = SESSION_HTTPS_ONLY,
+                 skip_paths: tuple[str, ...] = ()):
+        self.app = app
+        self.store = store
+        self.signer = TimestampSigner(secret_key)
+        self.session_cookie = session_cookie
+        self.max_age = max_age
+        self.refresh_after = refresh_after
+        self.security_flags = "httponly; samesite=lax" + ("; secure" if https_only else "")
+        self.skip_paths = skip_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        if self.skip_paths and scope["path"].startswith(self.skip_paths):
+            scope["session"] = ServerSession(None)
+            await self.app(scope, receive, send)
+            return
+
+        cookie = HTTPConnection(scope).cookies.get(self.session_cookie)
+        sid, signed_at = self._unsign(cookie)
+        session = ServerSession(sid)
+        scope["session"] = session
+        if sid:
+            await self._load(session, signed_at)
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                header = await self._commit(session)
+                if header:
+                    MutableHeaders(scope=message).append("Set-Cookie", header)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _unsign(self, cookie: Optional[str]) -> tuple[Optional[str], float]:
+        if not cookie:
+            return None, 0.0
+        try:
+            sid, signed_at = self.signer.unsign(cookie, max_age=self.max_age,
+                                                return_timestamp=True)
+        except BadSignature:
+            return None, 0.0  # tampered, expired, or a pre-server-side cookie
+        return sid.decode(), signed_at.timestamp()
+
+    async def _load(self, session: ServerSession, signed_at: float):
+        try:
+            data = await self.store.load(session.sid)
+        except Exception as e:
+            print(f"⚠️ Session load failed: {str(e)}")
+            return
+        session.data = data or {}
+        session.refresh = bool(data) and time.time() - signed_at >= self.refresh_after
+
+    def _cookie(self, value: str, max_age: int) -> str:
+        return (f"{self.session_cookie}={value}; path=/; Max-Age={max_age}; "
+                f"{self.security_flags}")
+
+    # persist a changed session, or refresh a used one; returns the
+    # Set-Cookie value, if any
+    async def _commit(self, session: ServerSession) -> Optional[str]:
+        if not session.modified:
+            if not session.refresh:
+                return None
+            try:
+                await self.store.touch(session.sid, self.max_age)
+            except Exception as e:
+                print(f"⚠️ Session refresh failed: {str(e)}")
+                return None
+            return self._cookie(self.signer.sign(session.sid).decode(), self.max_age)
+
+        old_sid, sid = session.sid, session.sid
+        try:
+            if session.rotate and old_sid:
+                await self.store.delete(old_sid)
+                sid = None
+            if not session.data:
+                return self._cookie("null", 0) if old_sid else None
+            sid = sid or secrets.token_urlsafe(32)
+            await self.store.save(sid, session.data, self.max_age)
+        except Exception as e:
+            print(f"⚠️ Session save failed: {str(e)}")
+            return None
+        session.sid = sid
+        return self._cookie(self.signer.sign(sid).decode(), self.max_age)
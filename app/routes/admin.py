@@ -0,0 +1,53 @@
+# app/routes/admin.py
+
+import json
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.middleware.compression import compression_stats
+from app.utils.db.cache import cache_stats
+from app.utils.importer import IMPORT_FORMATS, SCHEMAS, import_records
+from app.utils.router import APIRouter
+from app.utils.security import require_role
+
+router = APIRouter(prefix="/admin")
+
+# request content types accepted by the import endpoint
+IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+@router.get("/stats")
+@require_role("admin")
+async def get_admin_stats(request: Request):
+    return JSONResponse({
+        "cache": cache_stats(),
+        "compression": compression_stats.stats(),
+    })
+
+
+# Upload the raw file as the request body, e.g.
+#   curl --data-binary @clients.csv -H "Content-Type: text/csv" .../admin/import/client
+@router.post("/import/{model}")
+@require_role("admin")
+async def post_admin_import(request: Request, model: str):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    fmt = request.query_params.get("format") or IMPORT_CONTENT_TYPES.get(content_type)
+
+    if model not in SCHEMAS:
+        return JSONResponse({"error": f"Unsupported import model: {model}"},
+                            status_code=404)
+    if fmt not in IMPORT_FORMATS:
+        return JSONResponse(
+            {"error": "Send text/csv or application/x-ndjson"},
+            status_code=415)
+
+    async def progress():
+        async for snapshot in import_records(model, fmt, request.stream()):
+            yield json.dumps(snapshot) + "\n"
+
+    return StreamingResponse(progress(), media_type="application/x-ndjson")
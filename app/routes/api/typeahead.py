@@ -0,0 +1,61 @@
+# app/routes/api/typeahead.py
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from app.utils.acl import get_client_filter
+from app.utils.db.associate import typeahead_associates
+from app.utils.db.client import typeahead_clients
+from app.utils.format import associate_label, client_label
+from app.utils.router import APIRouter
+from app.utils.security import require_role
+
+router = APIRouter(prefix="/api/typeahead")
+
+TYPEAHEAD_LIMIT = 10
+MAX_TYPEAHEAD_LIMIT = 25
+
+
+def _params(request: Request) -> tuple[str, int]:
+    params = request.query_params
+    try:
+        limit = int(params.get("limit", TYPEAHEAD_LIMIT))
+    except ValueError:
+        limit = TYPEAHEAD_LIMIT
+    return params.get("q", "").strip(), min(max(limit, 1), MAX_TYPEAHEAD_LIMIT)
+
+
+def _options(records, label) -> list[dict[str, str]]:
+    return [{"value": record.id, "label": label(record)} for record in records]
+
+
+# e.g. /api/typeahead/client?q=acme&limit=10
+@router.get("/client")
+@require_role(["admin", "sales", "tech"])
+async def get_typeahead_clients(request: Request):
+    query, limit = _params(request)
+    if not query:
+        return JSONResponse({"results": []})
+
+    result = await typeahead_clients(query, get_client_filter(request), limit)
+    if "failure" in result:
+        return JSONResponse({"error": result["failure"]["msg"]}, status_code=500)
+
+    return JSONResponse(
+        {"results": _options(result["success"]["clients"], client_label)})
+
+
+# e.g. /api/typeahead/associate?q=jo&limit=10
+@router.get("/associate")
+@require_role(["admin", "sales"])
+async def get_typeahead_associates(request: Request):
+    query, limit = _params(request)
+    if not query:
+        return JSONResponse({"results": []})
+
+    result = await typeahead_associates(query, limit=limit)
+    if "failure" in result:
+        return JSONResponse({"error": result["failure"]["msg"]}, status_code=500)
+
+    return JSONResponse(
+        {"results": _options(result["success"]["associates"], associate_label)})
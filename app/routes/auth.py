@@ -4,16 +4,25 @@ from fastapi import APIRouter, Form, Request
 from fastapi.responses import RedirectResponse
 from starlette.status import HTTP_303_SEE_OTHER
 
+from app.middleware.form_data import get_form
 from app.utils.db.associate import get_associate_by_username, update_associate
 from app.utils.flash import get_flashes
 from app.utils.format import force_string_to_list, encode_id
-from app.utils.security import verify_password, generate_salt, hash_password
+from app.utils.security import (
+    generate_salt,
+    hash_password,
+    public,
+    reset_exempt,
+    verify_password,
+)
 from app.utils.session import create_session, force_password_reset_required, clear_session
 from app.utils.templates import render
 
 router = APIRouter()
 
 @router.get("/login")
+@public
+@reset_exempt
 async def get_login(request: Request):
     if request.session.get("id58"):
         return RedirectResponse("/", status_code=303)
@@ -29,9 +38,11 @@ async def get_login(request: Request):
     )
 
 @router.post("/login")
+@public
+@reset_exempt
 async def post_login(request: Request):
 
-    form = getattr(request.state, "form", {}) or {}
+    form = await get_form(request)
     username = form.get("username")
     password = form.get("password")
     
@@ -114,6 +125,7 @@ async def post_login(request: Request):
     return RedirectResponse("/", status_code=303)
 
 @router.get("/auth/set-password")
+@reset_exempt
 async def get_set_password(request: Request):
     
     return render(
@@ -126,9 +138,10 @@ async def get_set_password(request: Request):
     )
 
 @router.post("/auth/set-password")
+@reset_exempt
 async def post_set_password(request: Request):
     
-    form = getattr(request.state, "form", {}) or {}
+    form = await get_form(request)
     password = form.get("password")
     confirm = form.get("confirm")
 
@@ -185,6 +198,8 @@ async def post_set_password(request: Request):
     return RedirectResponse("/", status_code=303)
 
 @router.get("/logout")
+@public
+@reset_exempt
 async def get_logout(request: Request):
   clear_session(request)
   request.session["flash"] = ["You are now logged out."]
@@ -0,0 +1,48 @@
+# app/routes/export.py
+
+from datetime import datetime, timezone
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.utils.acl import get_client_filter, get_order_filter
+from app.utils.export import EXPORT_COLUMNS, EXPORT_FORMATS, export_records, parse_columns
+from app.utils.router import APIRouter
+from app.utils.security import require_role
+
+router = APIRouter(prefix="/export")
+
+# export filters reuse the list-view permission filters
+FILTERS = {
+    "order": get_order_filter,
+    "client": get_client_filter,
+}
+
+
+# e.g. /export/order?format=csv&columns=invoice_number,total_due&gzip=1
+@router.get("/{model}")
+@require_role(["admin", "sales", "tech"])
+async def get_export(request: Request, model: str):
+    if model not in EXPORT_COLUMNS:
+        return JSONResponse({"error": f"Unsupported export model: {model}"},
+                            status_code=404)
+
+    params = request.query_params
+    fmt = params.get("format", "csv")
+    if fmt not in EXPORT_FORMATS:
+        return JSONResponse({"error": f"Unsupported export format: {fmt}"},
+                            status_code=400)
+    try:
+        columns = parse_columns(model, params.get("columns"))
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    gzip = params.get("gzip") in ("1", "true")
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d")
+    filename = f"{model}s-{stamp}.{fmt}" + (".gz" if gzip else "")
+
+    return StreamingResponse(
+        export_records(model, fmt, FILTERS[model](request), columns, gzip=gzip),
+        media_type="application/gzip" if gzip else EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,78 @@
+# app/routes/search.py
+
+import time
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from app.utils.acl import get_visibility
+from app.utils.flash import get_flashes
+from app.utils.format import encode_id
+from app.utils.router import APIRouter
+from app.utils.search import DOCUMENTS, SEARCH_LIMIT, search_index
+from app.utils.security import require_role
+from app.utils.templates import render
+
+router = APIRouter(prefix="/search")
+
+SHOW_HANDLERS = {
+    "client": "get_show_client",
+    "associate": "get_show_associate",
+    "order": "get_show_order",
+}
+
+
+# the kinds a request may search, and the ids it may see per kind
+async def visible_to(request: Request) -> tuple[list[str], dict[str, frozenset]]:
+    visibility = await get_visibility(request)
+    if visibility is None:
+        return list(DOCUMENTS), {}
+    # associate pages are admin-only
+    return ["client", "order"], {
+        "client": visibility.clients,
+        "order": visibility.orders,
+    }
+
+
+# e.g. /search?q=acme&kind=client, or with &format=json
+@router.get("")
+@require_role(["admin", "sales", "tech"])
+async def get_search(request: Request):
+    params = request.query_params
+    query = params.get("q", "")
+    kinds, allowed = await visible_to(request)
+    if params.get("kind"):
+        kinds = [kind for kind in kinds if kind == params["kind"]]
+    try:
+        limit = min(max(int(params.get("limit", SEARCH_LIMIT)), 1), 100)
+    except ValueError:
+        limit = SEARCH_LIMIT
+
+    started = time.perf_counter()
+    results = search_index.search(query, kinds=kinds, allowed=allowed,
+                                  limit=limit) if kinds else []
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    for result in results:
+        result["id58"] = encode_id(result["id"])
+        result["url"] = str(request.url_for(SHOW_HANDLERS[result["kind"]],
+                                            id58=result["id58"]))
+
+    if params.get("format") == "json":
+        return JSONResponse({
+            "query": query,
+            "results": results,
+            "ready": search_index.ready,
+            "ms": elapsed_ms,
+        })
+
+    return render(
+        "search.jinja",
+        request,
+        {
+            "query": query,
+            "results": results,
+            "ready": search_index.ready,
+            "flash": get_flashes(request),
+        },
+    )
@@ -3,6 +3,7 @@
 from fastapi import Request
 from fastapi.responses import RedirectResponse
 
+from app.utils.conditional import check_list_page, check_record_page, with_validator
 from app.utils.db.associate import (
   create_associate,
   delete_associate,
@@ -13,6 +14,7 @@ from app.utils.db.associate import (
 from app.utils.flash import get_flashes
 from app.utils.form import parse_record
 from app.utils.format import force_string_to_list
+from app.utils.pagination import get_page_params
 from app.utils.router import APIRouter
 from app.utils.security import require_role
 from app.utils.templates import render
@@ -23,23 +25,30 @@ router = APIRouter(prefix="/associate")
 @router.get("/")
 @require_role("admin")
 async def get_all_associates(request: Request):
-    
-    result = await read_all_associates()
+    cached, validator = await check_list_page(request, "associate", "associate/all.jinja")
+    if cached:
+        return cached
+
+    result = await read_all_associates(page=get_page_params(request),
+                                       slim=True,
+                                       secondary=True)
     if "failure" in result:
         return render(
             "errors/server-error.jinja", request, {"failure": result["failure"]}
         )
     data = result["success"]
 
-    return render(
+    response = render(
         "associate/all.jinja",
         request,
         {
             "associates": data["associates"],
             "id58_by_id": data["id58_by_id"],
+            "page": data["page"],
             "flash": get_flashes(request),
         },
     )
+    return with_validator(response, validator)
 
 
 @router.get("/new")
@@ -97,7 +106,7 @@ async def post_new_associate(request: Request):
 @require_role("admin")
 async def get_show_associate(request: Request, id58: str):
     
-    result = await read_one_associate(id58)
+    result = await read_one_associate(id58, include="detail")
     if "failure" in result:
         fail = result["failure"]
         if fail["type"] == "db":
@@ -120,7 +129,11 @@ async def get_show_associate(request: Request, id58: str):
         return render("errors/server-error.jinja", request, {"failure": fail})
     associate = result["success"]["associate"]
 
-    return render(
+    cached, validator = check_record_page(request, "associate/show.jinja", associate)
+    if cached:
+        return cached
+
+    response = render(
         "associate/show.jinja",
         request,
         {
@@ -129,6 +142,7 @@ async def get_show_associate(request: Request, id58: str):
             "flash": get_flashes(request),
         },
     )
+    return with_validator(response, validator)
 
 
 @router.get("/{id58}/edit")
@@ -3,6 +3,14 @@
 from fastapi import Request
 from fastapi.responses import RedirectResponse
 
+from app.utils.acl import (
+  can_edit,
+  can_edit_record,
+  can_view_record,
+  get_client_filter,
+  id_from_id58,
+)
+from app.utils.conditional import check_list_page, check_record_page, with_validator
 from app.utils.db.client import (
   create_client,
   delete_client,
@@ -13,8 +21,9 @@ from app.utils.db.client import (
 from app.utils.flash import get_flashes
 from app.utils.form import parse_record
 from app.utils.format import force_string_to_list
+from app.utils.pagination import get_page_params
 from app.utils.router import APIRouter
-from app.utils.security import require_role, get_client_filter, is_admin
+from app.utils.security import require_role
 from app.utils.templates import render
 from app.utils.validators.client import validate_client_form
 
@@ -26,22 +35,32 @@ router = APIRouter(prefix="/client")
 async def get_all_clients(request: Request):
     
     where = get_client_filter(request)
-    result = await read_all_clients(where)
+    cached, validator = await check_list_page(request, "client", "client/all.jinja",
+                                              where)
+    if cached:
+        return cached
+
+    result = await read_all_clients(where,
+                                    page=get_page_params(request),
+                                    slim=True,
+                                    secondary=True)
     if "failure" in result:
         return render(
             "errors/server-error.jinja", request, {"failure": result["failure"]}
         )
     data = result["success"]
 
-    return render(
+    response = render(
         "client/all.jinja",
         request,
         {
             "clients": data["clients"],
             "id58_by_id": data["id58_by_id"],
+            "page": data["page"],
             "flash": get_flashes(request),
         },
     )
+    return with_validator(response, validator)
 
 @router.get("/new")
 @require_role(["admin", "sales"])
@@ -96,7 +115,7 @@ async def post_new_client(request: Request):
 @require_role(["admin", "sales", "tech"])
 async def get_show_client(request: Request, id58: str):
 
-    result = await read_one_client(id58)
+    result = await read_one_client(id58, include="detail")
     if "failure" in result:
         fail = result["failure"]
         if fail["type"] == "db":
@@ -119,13 +138,17 @@ async def get_show_client(request: Request, id58: str):
         return render("errors/server-error.jinja", request, {"failure": fail})
     client = result["success"]["client"]
 
-    if not is_admin(request):
-        allowed_ids = set(request.session.get("sales_client_ids", [])) | set(request.session.get("tech_client_ids", []))
-        if client.id not in allowed_ids:
-            request.session["flash"] = ["You do not have access to that client."]
-            return RedirectResponse("/client", status_code=303)
+    if not can_view_record(request, client):
+        request.session["flash"] = ["You do not have access to that client."]
+        return RedirectResponse("/client", status_code=303)
+    # only list the orders this associate may open
+    client.orders = [order for order in client.orders or [] if can_view_record(request, order)]
 
-    return render(
+    cached, validator = check_record_page(request, "client/show.jinja", client)
+    if cached:
+        return cached
+
+    response = render(
         "client/show.jinja",
         request,
         {
@@ -134,6 +157,7 @@ async def get_show_client(request: Request, id58: str):
             "flash": get_flashes(request),
         },
     )
+    return with_validator(response, validator)
 
 
 @router.get("/{id58}/edit")
@@ -164,11 +188,9 @@ async def get_edit_client(request: Request, id58: str):
     client = result["success"]["client"]
     id58 = result["success"]["id58"]
 
-    if not is_admin(request):
-        allowed_ids = set(request.session.get("sales_client_ids", []))
-        if client.id not in allowed_ids:
-            request.session["flash"] = ["You do not have access to that client."]
-            return RedirectResponse("/client", status_code=303)
+    if not can_edit_record(request, client):
+        request.session["flash"] = ["You do not have access to that client."]
+        return RedirectResponse("/client", status_code=303)
 
     parsed_record = parse_record(client)
     return render(
@@ -201,11 +223,9 @@ async def post_edit_client(request: Request, id58: str):
         )
     client = result["success"]["client"]
 
-    if not is_admin(request):
-        allowed_ids = set(request.session.get("sales_client_ids", []))
-        if client.id not in allowed_ids:
-            request.session["flash"] = ["You do not have access to that client."]
-            return RedirectResponse("/client", status_code=303)
+    if not await can_edit(request, "client", id_from_id58(id58)):
+        request.session["flash"] = ["You do not have access to that client."]
+        return RedirectResponse("/client", status_code=303)
 
     result = await update_client(id58, client)
     if "failure" in result:
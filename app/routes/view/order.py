@@ -3,8 +3,18 @@
 from fastapi import Request
 from fastapi.responses import RedirectResponse
 
-from app.utils.db.associate import read_all_associates
-from app.utils.db.client import read_all_clients
+from app.utils.acl import (
+  can_edit,
+  can_edit_record,
+  can_view_record,
+  get_order_filter,
+  get_visibility,
+  id_from_id58,
+)
+from app.utils.conditional import check_list_page, check_record_page, with_validator
+from app.utils.db.associate import read_associate_options
+from app.utils.db.client import read_client_options
+from app.utils.db.loader import find_by_id
 from app.utils.db.order import (
   create_order,
   delete_order,
@@ -14,64 +24,93 @@ from app.utils.db.order import (
 )
 from app.utils.flash import get_flashes
 from app.utils.form import parse_record
-from app.utils.format import force_string_to_list
+from app.utils.format import associate_label, client_label, force_string_to_list
+from app.utils.pagination import get_page_params
 from app.utils.router import APIRouter
-from app.utils.security import require_role, is_admin, get_order_filter, get_client_filter
+from app.utils.security import require_role
 from app.utils.templates import render
 from app.utils.validators.order import validate_order_form
 
 router = APIRouter(prefix="/order")
 
 
+# options for the clients/associates already chosen in `form`; the order
+# forms fetch any others from /api/typeahead as the user types
+async def load_chosen_options(request: Request, form: dict, order_id=None) -> dict:
+    def chosen(*names):
+        ids = [id for name in names for id in force_string_to_list(form.get(name) or [])]
+        return list(dict.fromkeys(id for id in ids if id))
+
+    # posted ids are untrusted: never label a client the user can't see,
+    # except the client of the order being edited
+    visibility = await get_visibility(request)
+    allowed = set()
+    if visibility is not None and order_id and visibility.can_view("order", order_id):
+        order = await find_by_id("order", order_id)
+        if order:
+            allowed.add(order.client_id)
+    client_ids = [id for id in chosen("client_id")
+                  if visibility is None or id in allowed
+                  or visibility.can_view("client", id)]
+
+    # cached reference lookups; a malformed id in a rejected form fails
+    # the read, and the user re-picks it
+    clients = await read_client_options(client_ids)
+    associates = await read_associate_options(
+        chosen("sales_associate_ids", "tech_associate_ids", "audited_by_id"))
+    clients = clients["success"]["clients"] if "success" in clients else []
+    associates = associates["success"]["associates"] if "success" in associates else []
+
+    return {
+        "client_options": [{"value": c.id, "label": client_label(c)} for c in clients],
+        "associate_options": [{"value": a.id, "label": associate_label(a)} for a in associates],
+    }
+
+
 @router.get("/")
 @require_role(["admin", "sales", "tech"])
 async def get_all_orders(request: Request):
 
     where = get_order_filter(request)
-    result = await read_all_orders(where)
+    cached, validator = await check_list_page(request, "order", "order/all.jinja",
+                                              where)
+    if cached:
+        return cached
+
+    result = await read_all_orders(where,
+                                   page=get_page_params(request),
+                                   slim=True,
+                                   secondary=True)
     if "failure" in result:
         return render(
             "errors/server-error.jinja", request, {"failure": result["failure"]}
         )
     data = result["success"]
 
-    return render(
+    response = render(
         "order/all.jinja",
         request,
         {
             "orders": data["orders"],
             "id58_by_id": data["id58_by_id"],
+            "page": data["page"],
             "flash": get_flashes(request),
         },
     )
+    return with_validator(response, validator)
 
 
 @router.get("/new")
 @require_role(["admin", "sales"])
 async def get_new_order(request: Request):
 
-    result = await read_all_associates()
-    if "failure" in result:
-        return render(
-            "errors/server-error.jinja", request, {"failure": result["failure"]}
-        )
-    associates = result["success"]["associates"]
-
-    where = get_client_filter(request)
-    result = await read_all_clients(where)
-    if "failure" in result:
-        return render(
-            "errors/server-error.jinja", request, {"failure": result["failure"]}
-        )
-    clients = result["success"]["clients"]
-
+    form = getattr(request.state, "form", {}) or {}
     return render(
         "order/new.jinja",
         request,
         {
-            "clients": clients,
-            "associates": associates,
-            "form": getattr(request.state, "form", {}) or {},
+            **await load_chosen_options(request, form),
+            "form": form,
             "flash": get_flashes(request),
         },
     )
@@ -88,6 +127,7 @@ async def post_new_order(request: Request):
             "order/new.jinja",
             request,
             {
+                **await load_chosen_options(request, getattr(request.state, "form", {}) or {}),
                 "form": getattr(request.state, "form", {}) or {},
                 "field_errors": fail["field_errors"],
                 "flash": force_string_to_list(fail["flash"]),
@@ -103,6 +143,7 @@ async def post_new_order(request: Request):
                 "order/new.jinja",
                 request,
                 {
+                    **await load_chosen_options(request, getattr(request.state, "form", {}) or {}),
                     "form": getattr(request.state, "form", {}) or {},
                     "flash": force_string_to_list(force_string_to_list(fail["msg"])),
                 },
@@ -117,7 +158,7 @@ async def post_new_order(request: Request):
 @require_role(["admin", "sales", "tech"])
 async def get_show_order(request: Request, id58: str):
 
-    result = await read_one_order(id58)
+    result = await read_one_order(id58, include="detail")
     if "failure" in result:
         fail = result["failure"]
         if fail["type"] == "db":
@@ -140,13 +181,15 @@ async def get_show_order(request: Request, id58: str):
         return render("errors/server-error.jinja", request, {"failure": fail})
     order = result["success"]["order"]
 
-    if not is_admin(request):
-        allowed_ids = set(request.session.get("sales_order_ids", [])) | set(request.session.get("tech_order_ids", []))
-        if order.id not in allowed_ids:
-            request.session["flash"] = ["You do not have access to that order."]
-            return RedirectResponse("/order", status_code=303)
+    if not can_view_record(request, order):
+        request.session["flash"] = ["You do not have access to that order."]
+        return RedirectResponse("/order", status_code=303)
 
-    return render(
+    cached, validator = check_record_page(request, "order/show.jinja", order)
+    if cached:
+        return cached
+
+    response = render(
         "order/show.jinja",
         request,
         {
@@ -155,6 +198,7 @@ async def get_show_order(request: Request, id58: str):
             "flash": get_flashes(request),
         },
     )
+    return with_validator(response, validator)
 
 
 @router.get("/{id58}/edit")
@@ -185,37 +229,19 @@ async def get_edit_order(request: Request, id58: str):
     order = result["success"]["order"]
     id58 = result["success"]["id58"]
 
-    if not is_admin(request):
-        allowed_ids = set(request.session.get("sales_order_ids", []))
-        if order.id not in allowed_ids:
-            request.session["flash"] = ["You do not have access to that order."]
-            return RedirectResponse("/order", status_code=303)
-
-    result = await read_all_associates()
-    if "failure" in result:
-        return render(
-            "errors/server-error.jinja", request, {"failure": result["failure"]}
-        )
-    associates = result["success"]["associates"]
-
-    where = get_client_filter(request)
-    result = await read_all_clients(where)
-    if "failure" in result:
-        return render(
-            "errors/server-error.jinja", request, {"failure": result["failure"]}
-        )
-    clients = result["success"]["clients"]
+    if not can_edit_record(request, order):
+        request.session["flash"] = ["You do not have access to that order."]
+        return RedirectResponse("/order", status_code=303)
 
-    parsed_record = parse_record(order)
+    form = getattr(request.state, "form", {}) or parse_record(order)
     return render(
         "order/edit.jinja",
         request,
         {
-            "form": getattr(request.state, "form", {}) or parsed_record,
+            **await load_chosen_options(request, form, order.id),
+            "form": form,
             "id58": id58,
             "flash": get_flashes(request),
-            "associates": associates,
-            "clients": clients,
         },
     )
 
@@ -231,6 +257,9 @@ async def post_edit_order(request: Request, id58: str):
             "order/edit.jinja",
             request,
             {
+                **await load_chosen_options(request,
+                                            getattr(request.state, "form", {}) or {},
+                                            id_from_id58(id58)),
                 "form": getattr(request.state, "form", {}) or {},
                 "id58": id58,
                 "field_errors": fail["field_errors"],
@@ -239,11 +268,9 @@ async def post_edit_order(request: Request, id58: str):
         )
     order = result["success"]["order"]
 
-    if not is_admin(request):
-        allowed_ids = set(request.session.get("sales_order_ids", []))
-        if order.id not in allowed_ids:
-            request.session["flash"] = ["You do not have access to that order."]
-            return RedirectResponse("/order", status_code=303)
+    if not await can_edit(request, "order", id_from_id58(id58)):
+        request.session["flash"] = ["You do not have access to that order."]
+        return RedirectResponse("/order", status_code=303)
 
     result = await update_order(id58, order)
     if "failure" in result:
@@ -253,6 +280,9 @@ async def post_edit_order(request: Request, id58: str):
                 "order/edit.jinja",
                 request,
                 {
+                    **await load_chosen_options(request,
+                                                getattr(request.state, "form", {}) or {},
+                                                id_from_id58(id58)),
                     "form": getattr(request.state, "form", {}) or {},
                     "id58": id58,
                     "flash": force_string_to_list(fail["msg"]),
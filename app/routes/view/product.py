@@ -3,6 +3,7 @@
 from fastapi import Request
 from fastapi.responses import RedirectResponse
 
+from app.utils.conditional import check_list_page, check_record_page, with_validator
 from app.utils.db.product import (
   create_product,
   delete_product,
@@ -13,6 +14,7 @@ from app.utils.db.product import (
 from app.utils.flash import get_flashes
 from app.utils.form import parse_record
 from app.utils.format import force_string_to_list
+from app.utils.pagination import get_page_params
 from app.utils.router import APIRouter
 from app.utils.security import require_role
 from app.utils.templates import render
@@ -24,23 +26,30 @@ router = APIRouter(prefix="/product")
 @router.get("/")
 @require_role(["admin", "sales"])
 async def get_all_products(request: Request):
+    cached, validator = await check_list_page(request, "product", "product/all.jinja")
+    if cached:
+        return cached
 
-    result = await read_all_products()
+    result = await read_all_products(page=get_page_params(request),
+                                     slim=True,
+                                     secondary=True)
     if "failure" in result:
         return render(
             "errors/server-error.jinja", request, {"failure": result["failure"]}
         )
     data = result["success"]
 
-    return render(
+    response = render(
         "product/all.jinja",
         request,
         {
             "products": data["products"],
             "id58_by_id": data["id58_by_id"],
+            "page": data["page"],
             "flash": get_flashes(request),
         },
     )
+    return with_validator(response, validator)
 
 
 @router.get("/new")
@@ -119,7 +128,11 @@ async def get_show_product(request: Request, id58: str):
         return render("errors/server-error.jinja", request, {"failure": fail})
     product = result["success"]["product"]
 
-    return render(
+    cached, validator = check_record_page(request, "product/show.jinja", product)
+    if cached:
+        return cached
+
+    response = render(
         "product/show.jinja",
         request,
         {
@@ -128,6 +141,7 @@ async def get_show_product(request: Request, id58: str):
             "flash": get_flashes(request),
         },
     )
+    return with_validator(response, validator)
 
 
 @router.get("/{id58}/edit")
@@ -0,0 +1,182 @@
+# app/utils/acl.py
+#
+# Which clients and orders a non-admin associate may see, resolved from the
+# relation fields on the records themselves rather than id lists copied
+# into the session at login:
+#   view: the associate is one of the record's sales or tech associates
+#   edit: the associate is one of the record's sales associates
+# List queries filter with `has` on the indexed `*_associate_ids` fields.
+# Handlers holding the record check its own assignment fields
+# (`can_view_record`/`can_edit_record`). Checks by id use a per-associate
+# `Visibility`, held in `acl_cache`; a write drops only the associates named
+# on the record before and after it, and other workers converge within
+# ACL_CACHE_TTL_SECONDS.
+
+import asyncio
+from typing import Any, Iterable, Optional
+
+from fastapi import Request
+from prisma_client.partials import ClientAccess, OrderAccess
+
+from app.utils.db.cache import TTLCache, cached
+from app.utils.envars import ACL_CACHE_TTL_SECONDS, AUTH_STATUS
+from app.utils.format import decode_id58
+from app.utils.prisma import prisma
+
+# never serve a stale grant: no stale window, unlike the list caches
+acl_cache = TTLCache("acl", ttl=ACL_CACHE_TTL_SECONDS, stale_ttl=0)
+
+
+class Visibility:
+    """One associate's client and order ids, by role, as frozensets."""
+
+    __slots__ = ("sales_clients", "tech_clients", "clients",
+                 "sales_orders", "tech_orders", "orders")
+
+    def __init__(self, sales_clients, tech_clients, sales_orders, tech_orders):
+        self.sales_clients = frozenset(sales_clients)
+        self.tech_clients = frozenset(tech_clients)
+        self.clients = self.sales_clients | self.tech_clients
+        self.sales_orders = frozenset(sales_orders)
+        self.tech_orders = frozenset(tech_orders)
+        self.orders = self.sales_orders | self.tech_orders
+
+    def can_view(self, kind: str, id: str) -> bool:
+        return id in (self.clients if kind == "client" else self.orders)
+
+    def can_edit(self, kind: str, id: str) -> bool:
+        return id in (self.sales_clients if kind == "client" else self.sales_orders)
+
+
+def is_unrestricted(request: Request) -> bool:
+    return AUTH_STATUS == "disabled" or "admin" in request.session.get("roles", [])
+
+
+def id_from_id58(id58: Optional[str]) -> Optional[str]:
+    if not id58:
+        return None
+    try:
+        return decode_id58(id58)
+    except Exception:
+        return None
+
+
+def get_associate_id(request: Request) -> Optional[str]:
+    return id_from_id58(request.session.get("id58"))
+
+
+def _assigned_to(associate_id: Optional[str]) -> dict[str, Any]:
+    if associate_id is None:
+        return {"id": {"in": []}}  # force empty
+    return {
+        "OR": [
+            {"sales_associate_ids": {"has": associate_id}},
+            {"tech_associate_ids": {"has": associate_id}},
+        ]
+    }
+
+
+def get_client_filter(request: Request) -> dict[str, Any] | None:
+    """Return a Prisma-compatible `where` clause for filtering visible clients."""
+    if is_unrestricted(request):
+        return None  # No filter — full access
+    return _assigned_to(get_associate_id(request))
+
+
+def get_order_filter(request: Request) -> dict[str, Any] | None:
+    """Return a Prisma-compatible `where` clause for filtering visible orders."""
+    if is_unrestricted(request):
+        return None  # No filter — full access
+    return _assigned_to(get_associate_id(request))
+
+
+# resolve one associate's visibility from the clients and orders naming them
+@cached(acl_cache)
+async def read_visibility(associate_id: str):
+    where = _assigned_to(associate_id)
+    try:
+        clients, orders = await asyncio.gather(
+            # the primary: a grant must not lag behind the write that made it
+            ClientAccess.prisma(prisma).find_many(where=where),
+            OrderAccess.prisma(prisma).find_many(where=where),
+        )
+    except Exception as e:
+        return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
+
+    def split(records):
+        sales = [r.id for r in records if associate_id in r.sales_associate_ids]
+        tech = [r.id for r in records if associate_id in r.tech_associate_ids]
+        return sales, tech
+
+    sales_clients, tech_clients = split(clients)
+    sales_orders, tech_orders = split(orders)
+    return {
+        "success": {
+            "visibility": Visibility(sales_clients, tech_clients,
+                                     sales_orders, tech_orders),
+        }
+    }
+
+
+async def get_visibility(request: Request) -> Optional[Visibility]:
+    """The request's `Visibility`; `None` means unrestricted (admin)."""
+    if is_unrestricted(request):
+        return None
+    associate_id = get_associate_id(request)
+    if associate_id is None:
+        return Visibility((), (), (), ())
+    result = await read_visibility(associate_id)
+    if "failure" in result:
+        print(f"⚠️ ACL lookup failed: {result['failure']['msg']}")
+        return Visibility((), (), (), ())  # fail closed
+    return result["success"]["visibility"]
+
+
+# `id` may be None (e.g. an undecodable id58): only admins get through
+async def can_view(request: Request, kind: str, id: Optional[str]) -> bool:
+    visibility = await get_visibility(request)
+    return visibility is None or visibility.can_view(kind, id)
+
+
+async def can_edit(request: Request, kind: str, id: Optional[str]) -> bool:
+    visibility = await get_visibility(request)
+    return visibility is None or visibility.can_edit(kind, id)
+
+
+# O(1) checks against a client or order the handler already holds
+def can_view_record(request: Request, record) -> bool:
+    if is_unrestricted(request):
+        return True
+    associate_id = get_associate_id(request)
+    return associate_id is not None and (associate_id in record.sales_associate_ids
+                                         or associate_id in record.tech_associate_ids)
+
+
+def can_edit_record(request: Request, record) -> bool:
+    if is_unrestricted(request):
+        return True
+    associate_id = get_associate_id(request)
+    return associate_id is not None and associate_id in record.sales_associate_ids
+
+
+def assigned_ids(*records) -> set[str]:
+    """Associates named on any of `records` (`None`s skipped), for `invalidate_acl`."""
+    ids = set()
+    for record in records:
+        if record is not None:
+            ids.update(record.sales_associate_ids or [])
+            ids.update(record.tech_associate_ids or [])
+    return ids
+
+
+def invalidate_acl(associate_ids: Optional[Iterable[str]] = None):
+    """
+    Call after a write that can change who is assigned to what, with the
+    associates named on the record before and after it; `None` drops all.
+    """
+    if associate_ids is None:
+        acl_cache.invalidate()
+        return
+    keys = [read_visibility.cache_key(id) for id in set(associate_ids) if id]
+    if keys:
+        acl_cache.invalidate(keys)
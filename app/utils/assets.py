@@ -0,0 +1,177 @@
+# app/utils/assets.py
+#
+# Fingerprinted static assets. The build step (`./scripts/assets.sh`, run by
+# the Dockerfile) copies every file under app/static to app/static/build
+# with a content hash in its name, writes `.br`/`.gz` variants for the
+# compressible ones, and records them all in build/manifest.json:
+#   css/app.css -> build/css/app.1f3a9c0e.css   (+ .br, .gz)
+# Templates link assets with `static_url('css/app.css')`. A fingerprinted
+# URL never changes content, so it is served with a year-long immutable
+# Cache-Control and browsers never ask for it again; a change ships under
+# a new name. In development, or before a build, `static_url` falls back to
+# the source file with its hash as a `?v=` query.
+
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from app.utils.compression import ENCODINGS, choose_encoding, compress, is_compressible
+from app.utils.envars import ENV_MODE
+
+STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
+BUILD_DIR = STATIC_DIR / "build"
+MANIFEST_PATH = BUILD_DIR / "manifest.json"
+STATIC_URL = "/static/"
+
+HASH_LENGTH = 8
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"  # sources: always check the ETag
+
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def file_hash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()[:HASH_LENGTH]
+
+
+def fingerprinted(name: str, digest: str) -> str:
+    stem, dot, ext = name.rpartition(".")
+    return f"{stem}.{digest}.{ext}" if dot else f"{name}.{digest}"
+
+
+def build_assets(static_dir: Path = STATIC_DIR,
+                 build_dir: Path = BUILD_DIR) -> dict[str, dict[str, Any]]:
+    """Write hashed copies, compressed variants and the manifest; return it."""
+    shutil.rmtree(build_dir, ignore_errors=True)
+    manifest = {}
+
+    for source in sorted(static_dir.rglob("*")):
+        if not source.is_file() or build_dir in source.parents:
+            continue
+        name = source.relative_to(static_dir).as_posix()
+        target = build_dir / fingerprinted(name, file_hash(source))
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(source, target)
+
+        data = source.read_bytes()
+        encodings = []
+        if is_compressible(mimetypes.guess_type(name)[0]):
+            for encoding in ENCODINGS:
+                compressed = compress(data, encoding)
+                if len(compressed) < len(data):  # else serve the original
+                    target.with_name(target.name + SUFFIXES[encoding]).write_bytes(compressed)
+                    encodings.append(encoding)
+
+        manifest[name] = {
+            "path": target.relative_to(static_dir).as_posix(),
+            "encodings": encodings,
+        }
+
+    build_dir.mkdir(parents=True, exist_ok=True)
+    (build_dir / MANIFEST_PATH.name).write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+class AssetManifest:
+    """The build manifest, by source name and by fingerprinted path."""
+
+    def __init__(self, path: Path = MANIFEST_PATH):
+        self.path = path
+        self.assets: Optional[dict[str, dict[str, Any]]] = None
+        self.built: dict[str, tuple[str, ...]] = {}
+        # development fallback: source name -> (mtime, hash)
+        self._hashes: dict[str, tuple[float, str]] = {}
+
+    def load(self):
+        self.assets = {}
+        if ENV_MODE == "development":
+            return  # sources change under the server; hash them as they do
+        try:
+            self.assets = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            print("⚠️ No static asset manifest; run ./scripts/assets.sh")
+        except ValueError as e:
+            print(f"⚠️ Unreadable static asset manifest: {str(e)}")
+        self.built = {entry["path"]: tuple(entry["encodings"])
+                      for entry in self.assets.values()}
+
+    def url(self, name: str) -> str:
+        if self.assets is None:
+            self.load()
+        entry = self.assets.get(name)
+        if entry is not None:
+            return STATIC_URL + entry["path"]
+        return f"{STATIC_URL}{name}?v={self._source_hash(name)}"
+
+    def _source_hash(self, name: str) -> str:
+        source = STATIC_DIR / name
+        try:
+            mtime = source.stat().st_mtime
+        except OSError:
+            return "0"  # a typo; the request will 404 anyway
+        cached = self._hashes.get(name)
+        if cached is None or cached[0] != mtime:
+            cached = self._hashes[name] = (mtime, file_hash(source))
+        return cached[1]
+
+
+asset_manifest = AssetManifest()
+
+
+def static_url(name: str) -> str:
+    """URL for a file under app/static, e.g. `static_url('css/app.css')`."""
+    return asset_manifest.url(name)
+
+
+class StaticAssets(StaticFiles):
+    """
+    `StaticFiles` that serves fingerprinted files as immutable, from their
+    `.br`/`.gz` variant when the client accepts one.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if asset_manifest.assets is None:
+            asset_manifest.load()
+        name = path.replace(os.sep, "/")
+        encodings = asset_manifest.built.get(name)
+
+        if encodings is None:
+            response = await super().get_response(path, scope)
+            if response.status_code in (200, 304):
+                response.headers.setdefault("Cache-Control", REVALIDATE)
+            return response
+
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""), encodings)
+        if encoding is None:
+            response = await super().get_response(path, scope)
+        else:
+            full_path = os.path.join(self.directory, path + SUFFIXES[encoding])
+            response = FileResponse(full_path,
+                                    stat_result=os.stat(full_path),
+                                    media_type=mimetypes.guess_type(name)[0])
+            response.headers["Content-Encoding"] = encoding
+            if self.is_not_modified(response.headers, request_headers):
+                response = Response(status_code=304, headers={
+                    "etag": response.headers["etag"],
+                    "content-encoding": encoding,
+                })
+
+        response.headers["Cache-Control"] = IMMUTABLE
+        if encodings:
+            response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+
+if __name__ == "__main__":
+    built = build_assets()
+    print(f"✅ Built {len(built)} static assets into {BUILD_DIR}")
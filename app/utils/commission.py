@@ -0,0 +1,133 @@
+# app/utils/commission.py
+#
+# Commissions in integer cents (see app/schemas/order.py), from an order's
+# stored `revenue`:
+#   sales_commission = revenue * SALES_COMMISSION_BPS / 10000, rounded half up
+#   tech_commission  = revenue * TECH_COMMISSION_BPS / 10000, rounded half up
+#   company_cut      = revenue - sales_commission - tech_commission
+# A role's pool is only paid when the order has associates in that role, and
+# is split evenly between them, the first associates absorbing leftover cents.
+
+from datetime import datetime, timezone
+from typing import Optional, Sequence
+
+from app.utils.envars import SALES_COMMISSION_BPS, TECH_COMMISSION_BPS
+from app.utils.pagination import iter_id_chunks
+from app.utils.prisma import prisma
+from app.utils.totals import BPS, NUMPY_MIN_ITEMS, div_half_up, np
+
+# Only settled orders earn commission
+COMMISSIONABLE_STATUSES = ["paid", "completed"]
+COMMISSION_CHUNK_SIZE = 2000
+
+
+def split_evenly(amount: int, count: int) -> list[int]:
+    if count <= 0:
+        return []
+    share, leftover = divmod(amount, count)
+    return [share + 1 if i < leftover else share for i in range(count)]
+
+
+def compute_commissions_batch(revenue: Sequence[int], sales_count: Sequence[int],
+                              tech_count: Sequence[int]) -> list[dict[str, int]]:
+    if np is not None and len(revenue) >= NUMPY_MIN_ITEMS:
+        return _compute_commissions_numpy(revenue, sales_count, tech_count)
+
+    results = []
+    for r, s, t in zip(revenue, sales_count, tech_count):
+        base = max(r, 0)
+        sales = div_half_up(base * SALES_COMMISSION_BPS, BPS) if s else 0
+        tech = div_half_up(base * TECH_COMMISSION_BPS, BPS) if t else 0
+        results.append({
+            "sales_commission": sales,
+            "tech_commission": tech,
+            "company_cut": r - sales - tech,
+        })
+    return results
+
+
+def _compute_commissions_numpy(revenue, sales_count, tech_count):
+    revenue = np.asarray(revenue, dtype=np.int64)
+    base = np.maximum(revenue, 0)
+    sales = np.where(
+        np.asarray(sales_count) > 0,
+        (base * SALES_COMMISSION_BPS + BPS // 2) // BPS, 0)
+    tech = np.where(
+        np.asarray(tech_count) > 0,
+        (base * TECH_COMMISSION_BPS + BPS // 2) // BPS, 0)
+    cut = revenue - sales - tech
+
+    return [{
+        "sales_commission": s,
+        "tech_commission": t,
+        "company_cut": c,
+    } for s, t, c in zip(sales.tolist(), tech.tolist(), cut.tolist())]
+
+
+def month_range(month: str) -> tuple[datetime, datetime]:
+    """`YYYY-MM` → [first instant of the month, first instant of the next) in UTC."""
+    start = datetime.strptime(month, "%Y-%m").replace(tzinfo=timezone.utc)
+    if start.month == 12:
+        end = start.replace(year=start.year + 1, month=1)
+    else:
+        end = start.replace(month=start.month + 1)
+    return start, end
+
+
+# compute, store and total commissions for every commissionable order in `where`
+async def close_commissions(where: Optional[dict] = None,
+                            chunk_size: int = COMMISSION_CHUNK_SIZE,
+                            dry_run: bool = False):
+    """
+    Returns order counts plus the per-associate payout for the period,
+    `{associate_id: {"sales": cents, "tech": cents}}`.
+    """
+    clauses = [{"status": {"in": COMMISSIONABLE_STATUSES}}]
+    if where:
+        clauses.append(where)
+
+    seen = updated = 0
+    payouts: dict[str, dict[str, int]] = {}
+
+    def credit(ids: list[str], amount: int, role: str):
+        for id, share in zip(ids, split_evenly(amount, len(ids))):
+            payout = payouts.setdefault(id, {"sales": 0, "tech": 0})
+            payout[role] += share
+
+    try:
+        async for orders in iter_id_chunks(prisma.order, {"AND": clauses},
+                                           chunk_size):
+            results = compute_commissions_batch(
+                [order.revenue for order in orders],
+                [len(order.sales_associate_ids) for order in orders],
+                [len(order.tech_associate_ids) for order in orders],
+            )
+
+            changed = []
+            for order, result in zip(orders, results):
+                credit(order.sales_associate_ids, result["sales_commission"],
+                       "sales")
+                credit(order.tech_associate_ids, result["tech_commission"],
+                       "tech")
+                if any(getattr(order, k) != v for k, v in result.items()):
+                    changed.append((order.id, result))
+
+            if changed and not dry_run:
+                # One round trip per chunk
+                async with prisma.batch_() as batcher:
+                    for id, result in changed:
+                        batcher.order.update(where={"id": id}, data=result)
+
+            seen += len(orders)
+            updated += len(changed)
+    except Exception as e:
+        return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
+
+    return {
+        "success": {
+            "orders": seen,
+            "updated": updated,
+            "dry_run": dry_run,
+            "payouts": payouts,
+        }
+    }
@@ -0,0 +1,88 @@
+# app/utils/compression.py
+#
+# Content codings shared by the static asset build (app/utils/assets.py) and
+# response compression (app/middleware/compression.py). Brotli is used when
+# installed; without it everything falls back to gzip.
+
+import gzip
+import zlib
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+# Preferred first
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Worth compressing; images and fonts other than these are already compressed
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/x-ndjson",
+    "application/xml",
+    "image/svg+xml",
+    "image/vnd.microsoft.icon",
+    "image/x-icon",
+)
+
+
+def is_compressible(media_type: Optional[str]) -> bool:
+    return bool(media_type) and media_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def accepted_encodings(header: str) -> set[str]:
+    """Codings an `Accept-Encoding` header allows, ignoring any with q=0."""
+    accepted = set()
+    for part in header.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip().removeprefix("q=")
+        if coding and q not in ("0", "0.0", "0.00", "0.000"):
+            accepted.add(coding.strip())
+    return accepted
+
+
+def choose_encoding(header: str,
+                    available: tuple[str, ...] = ENCODINGS) -> Optional[str]:
+    accepted = accepted_encodings(header)
+    for encoding in available:
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return None
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """One-shot compression at `level`, or the coding's maximum."""
+    if encoding == "br":
+        return brotli.compress(data, quality=11 if level is None else level)
+    # mtime=0: the same input always gives the same bytes
+    return gzip.compress(data, compresslevel=9 if level is None else level, mtime=0)
+
+
+class StreamCompressor:
+    """
+    Incremental compression for a streamed body: each `compress` returns
+    the bytes for that chunk right away (a sync flush), so the client can
+    start rendering before the body ends.
+    """
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=level)
+        else:
+            self._zlib = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def compress(self, data: bytes, flush: bool = True) -> bytes:
+        if self.encoding == "br":
+            out = self._brotli.process(data)
+            return out + self._brotli.flush() if flush else out
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
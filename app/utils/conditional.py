@@ -0,0 +1,198 @@
+# app/utils/conditional.py
+#
+# Conditional GETs for show and list pages. A page's validator covers
+# everything that can change what it renders:
+#   show pages  id and updated_at of the record and every related record
+#               loaded for it
+#   list pages  count and newest updated_at of the filtered set, and the
+#               page's query string
+# plus, for both, the viewer (id58 and roles) and the template version.
+# When the browser's copy is current the handler answers 304 and skips
+# rendering. A list page's stamp is read before its rows, uncached and with
+# the same routing, so the rows are never older than the validator sent with
+# them; a write in between only makes the next request miss. List reads must
+# stay uncached for this to hold. Pages with a flash pending always render: showing it is the
+# point of the request, and rendering is what pops it.
+
+import asyncio
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Iterable, Optional
+
+from fastapi import Request
+from prisma_client.partials import AssociateStamp, ClientStamp, OrderStamp, ProductStamp
+from pydantic import BaseModel
+from starlette.responses import Response
+
+from app.utils.assets import MANIFEST_PATH
+from app.utils.db.routing import read_client
+from app.utils.envars import ENV_MODE
+from app.utils.templates import TEMPLATES_DIR
+
+STAMPS = {
+    "associate": AssociateStamp,
+    "client": ClientStamp,
+    "order": OrderStamp,
+    "product": ProductStamp,
+}
+
+# Revalidate every time; only this browser may keep the page
+CACHE_CONTROL = "private, no-cache"
+
+_template_version: Optional[tuple[float, str]] = None
+
+
+def template_version() -> str:
+    """Hash of every template and the asset manifest the layout links."""
+    global _template_version
+    if _template_version is not None and ENV_MODE != "development":
+        return _template_version[1]
+
+    # Development edits templates under the running server: rehash on change
+    files = sorted(TEMPLATES_DIR.rglob("*.jinja"))
+    if MANIFEST_PATH.exists():
+        files.append(MANIFEST_PATH)
+    mtime = max((f.stat().st_mtime for f in files), default=0.0)
+    if _template_version is None or _template_version[0] != mtime:
+        digest = hashlib.sha256()
+        for f in files:
+            digest.update(f.read_bytes())
+        _template_version = (mtime, digest.hexdigest()[:16])
+    return _template_version[1]
+
+
+class Validator:
+    __slots__ = ("etag", "last_modified")
+
+    def __init__(self, etag: str, last_modified: Optional[datetime]):
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _validator(request: Request,
+               template_name: str,
+               parts: Iterable[Any],
+               last_modified: Optional[datetime]) -> Validator:
+    session = request.session
+    digest = hashlib.sha256()
+    for part in (template_version(), template_name, session.get("id58"),
+                 ",".join(sorted(session.get("roles", []))), *parts):
+        digest.update(str(part).encode())
+        digest.update(b"\0")
+    # Weak: the same page, not necessarily the same bytes (e.g. compressed)
+    return Validator(f'W/"{digest.hexdigest()[:32]}"',
+                     _as_utc(last_modified) if last_modified else None)
+
+
+def _stamps(record: BaseModel) -> Iterable[tuple[str, datetime]]:
+    """(id, updated_at) of a record and every related record loaded on it."""
+    if getattr(record, "updated_at", None) is not None:
+        yield record.id, record.updated_at
+    for value in record.__dict__.values():
+        for item in value if isinstance(value, list) else [value]:
+            if isinstance(item, BaseModel):
+                yield from _stamps(item)
+
+
+def record_validator(request: Request, template_name: str, record: BaseModel) -> Validator:
+    stamps = list(_stamps(record))
+    return _validator(request, template_name,
+                      [f"{id}@{updated_at.isoformat()}" for id, updated_at in stamps],
+                      max((updated_at for _, updated_at in stamps), default=None))
+
+
+async def read_list_stamp(model: str, where: Optional[dict] = None):
+    """Count and newest record of a filtered set, for `list_validator`."""
+    # Same routing as the list query, so both see the same data
+    actions = STAMPS[model].prisma(read_client(secondary=True))
+    try:
+        count, newest = await asyncio.gather(
+            actions.count(where=where or {}),
+            actions.find_first(where=where or {},
+                               order=[{"updated_at": "desc"}, {"id": "desc"}]),
+        )
+    except Exception as e:
+        return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
+    return {"success": {"count": count, "newest": newest}}
+
+
+def list_validator(request: Request, template_name: str, stamp: dict) -> Validator:
+    newest = stamp["newest"]
+    return _validator(
+        request, template_name,
+        [request.url.query, stamp["count"],
+         newest and f"{newest.id}@{newest.updated_at.isoformat()}"],
+        newest.updated_at if newest else None)
+
+
+def not_modified(request: Request, validator: Validator) -> Optional[Response]:
+    """A 304 when the browser's copy is still current, else `None`."""
+    if request.method not in ("GET", "HEAD") or request.session.get("flash"):
+        return None
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison (RFC 9110 13.1.2)
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        fresh = "*" in tags or validator.etag.removeprefix("W/") in tags
+    else:
+        fresh = _not_modified_since(request.headers.get("if-modified-since"),
+                                    validator.last_modified)
+
+    if not fresh:
+        return None
+    return with_validator(Response(status_code=304), validator)
+
+
+def _not_modified_since(header: Optional[str], last_modified: Optional[datetime]) -> bool:
+    if not header or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have whole seconds
+    return last_modified.replace(microsecond=0) <= _as_utc(since)
+
+
+def with_validator(response: Response, validator: Optional[Validator]) -> Response:
+    if validator is None:
+        return response
+    response.headers["ETag"] = validator.etag
+    if validator.last_modified is not None:
+        response.headers["Last-Modified"] = format_datetime(validator.last_modified,
+                                                            usegmt=True)
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    response.headers.add_vary_header("Cookie")
+    return response
+
+
+# In the handlers: return the 304 if there is one, else render and pass the
+# response through `with_validator`
+def check_record_page(request: Request,
+                      template_name: str,
+                      record: BaseModel) -> tuple[Optional[Response], Validator]:
+    validator = record_validator(request, template_name, record)
+    return not_modified(request, validator), validator
+
+
+async def check_list_page(request: Request,
+                          model: str,
+                          template_name: str,
+                          where: Optional[dict] = None
+                          ) -> tuple[Optional[Response], Optional[Validator]]:
+    # Call before reading the page's rows (see the note at the top)
+    result = await read_list_stamp(model, where)
+    if "failure" in result:
+        # Not fatal: the page renders, just without a validator
+        print(f"⚠️ List validator failed: {result['failure']['msg']}")
+        return None, None
+    validator = list_validator(request, template_name, result["success"])
+    return not_modified(request, validator), validator
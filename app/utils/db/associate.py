@@ -1,18 +1,45 @@
 # app/utils/db/associate.py
 
-from app.utils.format import encode_id
+from prisma_client.partials import AssociateListRow, AssociateNames, AssociateOption
+
+from app.utils.acl import invalidate_acl
+from app.utils.db.cache import TTLCache, cached
+from app.utils.db.loader import clear_loaded, find_by_id, prime_loaded
+from app.utils.db.routing import mark_write, read_client
+from app.utils.format import encode_id, lowercase_key, with_lowercase_keys
+from app.utils.pagination import build_page, build_page_query, iter_id_chunks
 from app.utils.prisma import prisma
+from app.utils.search import search_index
 from app.utils.security import generate_salt
 from app.utils.validators.id import validate_id58_to_id
 
+# option labels for the order forms: reference data that changes rarely and
+# is re-read on every form render (list views stay uncached)
+associates_cache = TTLCache("associates")
+
+# stored lowercased as `<field>_lc` for typeahead_associates
+ASSOCIATE_NAME_FIELDS = ("name",)
+
+
 # read all/filtered associate records
-async def read_all_associates(where={}):
+async def read_all_associates(where={}, page=None, slim=False, secondary=False):
+    # `slim` selects only the columns declared by `associate/all.jinja`
+    # `secondary` lets list views read from the replica, if configured
+    db = read_client(secondary)
+    associates_db = AssociateListRow.prisma(db) if slim else db.associate
     try:
-        associates = await prisma.associate.find_many(
-            where=where, order={"updated_at": "desc"})
+        if page is None:
+            associates = await associates_db.find_many(where=where,
+                                                       order={"updated_at": "desc"})
+        else:
+            associates = await associates_db.find_many(
+                **build_page_query(where, page))
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
 
+    if page is not None:
+        associates, page = build_page(associates, page)
+
     # Prepare separate id58 mapping
     id58_by_id = {
         associate.id: encode_id(associate.id)
@@ -23,11 +50,73 @@ async def read_all_associates(where={}):
         "success": {
             "associates": associates,
             "id58_by_id": id58_by_id,
+            "page": page,
         }
     }
 
-# read one associate record
-async def read_one_associate(id58):
+
+# option rows for chosen associate ids, in the order given
+@cached(associates_cache)
+async def read_associate_options(ids: list[str]):
+    if not ids:
+        return {"success": {"associates": []}}
+    try:
+        associates = await AssociateOption.prisma(prisma).find_many(where={"id": {"in": ids}})
+    except Exception as e:
+        return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
+    by_id = {associate.id: associate for associate in associates}
+    return {"success": {"associates": [by_id[id] for id in ids if id in by_id]}}
+
+
+# prefix-match associates for form typeaheads
+async def typeahead_associates(query: str, where=None, limit: int = 10):
+    # every field matched here is indexed (see prisma/schema.prisma)
+    key = query.strip().lower()
+    clauses = [{
+        "OR": [
+            {"username": {"startswith": key}},
+            {"name_lc": {"startswith": key}},
+        ]
+    }]
+    if where:
+        clauses.append(where)
+    db = read_client(secondary=True)
+    try:
+        associates = await AssociateOption.prisma(db).find_many(
+            where={"AND": clauses},
+            take=limit,
+        )
+    except Exception as e:
+        return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
+    # sorted here: an `$or` across indexes can't return a sorted range
+    associates.sort(key=lambda associate: associate.username.lower())
+
+    return {"success": {"associates": associates}}
+
+# relation profiles for `read_one_associate(id58, include=...)`
+ASSOCIATE_INCLUDES = {
+    # everything `associate/show.jinja` renders
+    "detail": {
+        "sales_clients": True,
+        "tech_clients": True,
+        "sales_orders": {
+            "take": 20,
+            "order_by": {
+                "updated_at": "desc"
+            }
+        },
+        "tech_orders": {
+            "take": 20,
+            "order_by": {
+                "updated_at": "desc"
+            }
+        },
+    },
+}
+
+
+# read one associate record, with relations when `include` names a profile
+async def read_one_associate(id58, include=None):
     result = await validate_id58_to_id(id58)
     if "failure" in result:
         return {
@@ -39,7 +128,12 @@ async def read_one_associate(id58):
     id = result["success"]["id"]
 
     try:
-        associate = await prisma.associate.find_unique(where={"id": id})
+        if include:
+            # Related records arrive with the associate in a single engine request
+            associate = await prisma.associate.find_unique(
+                where={"id": id}, include=ASSOCIATE_INCLUDES[include])
+        else:
+            associate = await find_by_id("associate", id)
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
     if not associate:
@@ -56,7 +150,14 @@ async def read_one_associate(id58):
 async def create_associate(data):
     try:
         data["salt"] = generate_salt()
-        associate = await prisma.associate.create(data=data)
+        associate = await prisma.associate.create(
+            data=with_lowercase_keys(data, ASSOCIATE_NAME_FIELDS))
+        prime_loaded("associate", associate)
+        search_index.upsert("associate", associate)
+        mark_write()
+        # only the associate's own visibility can change
+        invalidate_acl([associate.id])
+        associates_cache.invalidate()
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
 
@@ -80,7 +181,13 @@ async def update_associate(id58, data):
     id = result["success"]["id"]
 
     try:
-        associate = await prisma.associate.update(where={"id": id}, data=data)
+        associate = await prisma.associate.update(
+            where={"id": id}, data=with_lowercase_keys(data, ASSOCIATE_NAME_FIELDS))
+        prime_loaded("associate", associate)
+        search_index.upsert("associate", associate)
+        mark_write()
+        invalidate_acl([associate.id])
+        associates_cache.invalidate()
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
 
@@ -106,6 +213,11 @@ async def delete_associate(id58):
 
     try:
         await prisma.associate.delete(where={"id": id})
+        clear_loaded("associate", id)
+        search_index.remove("associate", id)
+        mark_write()
+        invalidate_acl([id])
+        associates_cache.invalidate()
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
 
@@ -114,6 +226,8 @@ async def delete_associate(id58):
 async def get_associate_by_username(username: str):
     try:
         associate = await prisma.associate.find_unique(where={"username": username})
+        # `create_session` re-reads this associate by id right after login
+        prime_loaded("associate", associate)
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
     if not associate:
@@ -125,3 +239,27 @@ async def get_associate_by_username(username: str):
             "id58": encode_id(associate.id)
         }
     }
+
+
+# fill `*_lc` on associates written before those fields existed
+async def backfill_associate_name_keys(chunk_size: int = 500):
+    seen = updated = 0
+    try:
+        async for associates in iter_id_chunks(AssociateNames.prisma(prisma), None,
+                                               chunk_size):
+            changed = []
+            for associate in associates:
+                keys = {f"{field}_lc": lowercase_key(getattr(associate, field))
+                        for field in ASSOCIATE_NAME_FIELDS}
+                if any(getattr(associate, k) != v for k, v in keys.items()):
+                    changed.append((associate.id, keys))
+            if changed:
+                async with prisma.batch_() as batcher:
+                    for id, keys in changed:
+                        batcher.associate.update(where={"id": id}, data=keys)
+            seen += len(associates)
+            updated += len(changed)
+    except Exception as e:
+        return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
+
+    return {"success": {"associates": seen, "updated": updated}}
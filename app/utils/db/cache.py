@@ -0,0 +1,154 @@
+# app/utils/db/cache.py
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from app.utils.envars import CACHE_MAX_ENTRIES, CACHE_STALE_SECONDS, CACHE_TTL_SECONDS
+
+# every cache created in this process, by name, for `cache_stats()`
+_caches: dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """
+    Process-wide LRU cache of db helper results.
+
+    Entries are fresh for `ttl` seconds, then served stale for up to
+    `stale_ttl` more seconds while one background refresh runs. Writes in
+    the owning db module call `invalidate()`, for every entry or just the
+    keys they affect; other workers converge within `ttl`.
+    """
+
+    def __init__(self,
+                 name: str,
+                 maxsize: int = CACHE_MAX_ENTRIES,
+                 ttl: float = CACHE_TTL_SECONDS,
+                 stale_ttl: float = CACHE_STALE_SECONDS):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: OrderedDict[str, tuple[Any, float, float]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._refreshing: set[asyncio.Task] = set()
+        self._generation = 0
+        self.stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+        _caches[name] = self
+
+    async def get_or_load(self, key: str, load: Callable[[], Awaitable[dict]]) -> dict:
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None:
+            value, fresh_until, stale_until = entry
+            if now < fresh_until:
+                self.stats["hits"] += 1
+                self._entries.move_to_end(key)
+                return value
+            if now < stale_until:
+                self.stats["stale_hits"] += 1
+                self._entries.move_to_end(key)
+                self._refresh(key, load)
+                return value
+            del self._entries[key]
+
+        self.stats["misses"] += 1
+        return await self._load(key, load)
+
+    async def _load(self, key: str, load: Callable[[], Awaitable[dict]]) -> dict:
+        # Concurrent misses for the same key share one query
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._generation
+        try:
+            result = await load()
+            # Only cache successes, and never a result that raced an invalidation
+            if ("success" in result and generation == self._generation
+                    and self._inflight.get(key) is future):
+                self._store(key, result)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            if not future.done():
+                future.cancel()  # the loading task itself was cancelled
+
+    def _refresh(self, key: str, load: Callable[[], Awaitable[dict]]):
+        if key in self._inflight:
+            return
+        self.stats["refreshes"] += 1
+        task = asyncio.ensure_future(self._load(key, load))
+        self._refreshing.add(task)
+        task.add_done_callback(self._refreshing.discard)
+
+    def _store(self, key: str, value: dict):
+        now = time.monotonic()
+        self._entries[key] = (value, now + self.ttl, now + self.ttl + self.stale_ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def invalidate(self, keys: Optional[Iterable[str]] = None):
+        """Drop every entry, or only `keys`; loads under way for them aren't stored."""
+        if keys is None:
+            self._entries.clear()
+            self._generation += 1
+        else:
+            for key in keys:
+                self._entries.pop(key, None)
+                self._inflight.pop(key, None)  # the next miss loads afresh
+        self.stats["invalidations"] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["stale_hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hit_ratio": round((lookups - self.stats["misses"]) / lookups, 4)
+            if lookups else None,
+        }
+
+
+def cached(cache: TTLCache):
+    """Cache an async db helper's `{"success": ...}` results in `cache`."""
+
+    def decorator(func: Callable[..., Awaitable[dict]]):
+
+        def cache_key(*args, **kwargs) -> str:
+            return json.dumps([func.__name__, args, kwargs], sort_keys=True, default=str)
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await cache.get_or_load(cache_key(*args, **kwargs),
+                                           lambda: func(*args, **kwargs))
+
+        # for `cache.invalidate(keys)`: called with the same arguments
+        wrapper.cache_key = cache_key
+        return wrapper
+
+    return decorator
+
+
+def cache_stats() -> dict[str, dict[str, Any]]:
+    return {name: cache.snapshot() for name, cache in _caches.items()}
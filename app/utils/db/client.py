@@ -1,19 +1,48 @@
 # app/utils/db/client.py
 
-from app.utils.format import encode_id
+from prisma_client.errors import UniqueViolationError
+from prisma_client.partials import ClientListRow, ClientNames, ClientOption
+
+from app.utils.acl import assigned_ids, invalidate_acl
+from app.utils.db.cache import TTLCache, cached
+from app.utils.db.counter import delete_sequence, invoice_sequence_key, seed_invoice_sequence
+from app.utils.db.loader import clear_loaded, find_by_id, prime_loaded
+from app.utils.db.routing import mark_write, read_client
+from app.utils.format import encode_id, lowercase_key, with_lowercase_keys
+from app.utils.pagination import build_page, build_page_query, iter_id_chunks
 from app.utils.prisma import prisma
+from app.utils.search import search_index
 from app.utils.security import generate_account_number
 from app.utils.validators.id import validate_id58_to_id
 
 
+# option labels for the order forms: reference data that changes rarely and
+# is re-read on every form render (list views stay uncached)
+clients_cache = TTLCache("clients")
+
+# stored lowercased as `<field>_lc` for typeahead_clients
+CLIENT_NAME_FIELDS = ("contact_name", "business_name")
+
+
 # read all/filtered client records
-async def read_all_clients(where={}):
+async def read_all_clients(where={}, page=None, slim=False, secondary=False):
+    # `slim` selects only the columns declared by `client/all.jinja`
+    # `secondary` lets list views read from the replica, if configured
+    db = read_client(secondary)
+    clients_db = ClientListRow.prisma(db) if slim else db.client
     try:
-        clients = await prisma.client.find_many(where=where,
-                                                order={"updated_at": "desc"})
+        if page is None:
+            clients = await clients_db.find_many(where=where,
+                                                 order={"updated_at": "desc"})
+        else:
+            clients = await clients_db.find_many(
+                **build_page_query(where, page))
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
 
+    if page is not None:
+        clients, page = build_page(clients, page)
+
     # Prepare separate id58 mapping
     id58_by_id = {client.id: encode_id(client.id) for client in clients}
 
@@ -21,12 +50,71 @@ async def read_all_clients(where={}):
         "success": {
             "clients": clients,
             "id58_by_id": id58_by_id,
+            "page": page,
         }
     }
 
 
-# read one client record
-async def read_one_client(id58):
+# option rows for chosen client ids, in the order given
+@cached(clients_cache)
+async def read_client_options(ids: list[str]):
+    if not ids:
+        return {"success": {"clients": []}}
+    try:
+        clients = await ClientOption.prisma(prisma).find_many(where={"id": {"in": ids}})
+    except Exception as e:
+        return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
+    by_id = {client.id: client for client in clients}
+    return {"success": {"clients": [by_id[id] for id in ids if id in by_id]}}
+
+
+# prefix-match clients for form typeaheads
+async def typeahead_clients(query: str, where=None, limit: int = 10):
+    # every field matched here is indexed (see prisma/schema.prisma)
+    query = query.strip()
+    key = query.lower()
+    clauses = [{
+        "OR": [
+            {"account_number": {"startswith": query}},
+            {"email": {"startswith": key}},
+            {"contact_name_lc": {"startswith": key}},
+            {"business_name_lc": {"startswith": key}},
+        ]
+    }]
+    if where:
+        clauses.append(where)
+    db = read_client(secondary=True)
+    try:
+        clients = await ClientOption.prisma(db).find_many(
+            where={"AND": clauses},
+            take=limit,
+        )
+    except Exception as e:
+        return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
+    # sorted here: an `$or` across indexes can't return a sorted range
+    clients.sort(key=lambda client: client.contact_name.lower())
+
+    return {"success": {"clients": clients}}
+
+
+# relation profiles for `read_one_client(id58, include=...)`
+CLIENT_INCLUDES = {
+    # everything `client/show.jinja` renders
+    "detail": {
+        "sales_associates": True,
+        "tech_associates": True,
+        "orders": {
+            "take": 20,
+            "order_by": {
+                "updated_at": "desc"
+            }
+        },
+    },
+}
+
+
+# read one client record, with relations when `include` names a profile
+async def read_one_client(id58, include=None):
     result = await validate_id58_to_id(id58)
     if "failure" in result:
         return {
@@ -38,7 +126,12 @@ async def read_one_client(id58):
     id = result["success"]["id"]
 
     try:
-        client = await prisma.client.find_unique(where={"id": id})
+        if include:
+            # Related records arrive with the client in a single engine request
+            client = await prisma.client.find_unique(
+                where={"id": id}, include=CLIENT_INCLUDES[include])
+        else:
+            client = await find_by_id("client", id)
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
     if not client:
@@ -47,11 +140,29 @@ async def read_one_client(id58):
     return {"success": {"client": client, "id58": encode_id(client.id)}}
 
 
+# create a client under a freshly allocated account number
+async def create_with_account_number(data, attempts: int = 3):
+    for attempt in range(attempts):
+        data["account_number"] = await generate_account_number()
+        try:
+            return await prisma.client.create(data=data)
+        except UniqueViolationError as e:
+            # Allocated numbers never repeat, but may hit a legacy random one
+            if "account_number" not in str(e) or attempt == attempts - 1:
+                raise
+
+
 # create a new client record
 async def create_client(data):
+    with_lowercase_keys(data, CLIENT_NAME_FIELDS)
     try:
-        data["account_number"] = await generate_account_number()
-        client = await prisma.client.create(data=data)
+        client = await create_with_account_number(data)
+        await seed_invoice_sequence(client.id, client.account_number)
+        prime_loaded("client", client)
+        search_index.upsert("client", client)
+        mark_write()
+        invalidate_acl(assigned_ids(client))
+        clients_cache.invalidate()
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
 
@@ -70,8 +181,16 @@ async def update_client(id58, data):
         }
     id = result["success"]["id"]
 
+    with_lowercase_keys(data, CLIENT_NAME_FIELDS)
     try:
+        # the assignments before the update
+        before = await find_by_id("client", id)
         client = await prisma.client.update(where={"id": id}, data=data)
+        prime_loaded("client", client)
+        search_index.upsert("client", client)
+        mark_write()
+        invalidate_acl(assigned_ids(before, client))
+        clients_cache.invalidate()
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
 
@@ -92,8 +211,38 @@ async def delete_client(id58):
     id = result["success"]["id"]
 
     try:
-        await prisma.client.delete(where={"id": id})
+        client = await prisma.client.delete(where={"id": id})
+        await delete_sequence(invoice_sequence_key(id))
+        clear_loaded("client", id)
+        search_index.remove("client", id)
+        mark_write()
+        invalidate_acl(assigned_ids(client))
+        clients_cache.invalidate()
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
 
     return {"success": True}
+
+
+# fill `*_lc` on clients written before those fields existed
+async def backfill_client_name_keys(chunk_size: int = 500):
+    seen = updated = 0
+    try:
+        async for clients in iter_id_chunks(ClientNames.prisma(prisma), None,
+                                            chunk_size):
+            changed = []
+            for client in clients:
+                keys = {f"{field}_lc": lowercase_key(getattr(client, field))
+                        for field in CLIENT_NAME_FIELDS}
+                if any(getattr(client, k) != v for k, v in keys.items()):
+                    changed.append((client.id, keys))
+            if changed:
+                async with prisma.batch_() as batcher:
+                    for id, keys in changed:
+                        batcher.client.update(where={"id": id}, data=keys)
+            seen += len(clients)
+            updated += len(changed)
+    except Exception as e:
+        return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
+
+    return {"success": {"clients": seen, "updated": updated}}
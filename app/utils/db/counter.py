@@ -0,0 +1,146 @@
+# app/utils/db/counter.py
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
+
+from prisma_client.errors import UniqueViolationError
+
+from app.utils.db.loader import find_by_id
+from app.utils.prisma import prisma
+
+
+# reserve `count` consecutive values from a counter in one atomic round trip
+async def reserve_sequence(key: str,
+                           count: int = 1) -> Optional[tuple[Optional[str], int, int]]:
+    """
+    Return `(prefix, first, last)` for the reserved block, or None when the
+    counter has not been seeded yet. The increment is a single `$inc`, so
+    concurrent callers always receive disjoint blocks.
+    """
+    counter = await prisma.counter.update(
+        where={"key": key}, data={"value": {"increment": count}})
+    if counter is None:
+        return None
+    return counter.prefix, counter.value - count + 1, counter.value
+
+
+# create a counter unless another worker already has
+async def seed_sequence(key: str, prefix: Optional[str] = None, value: int = 0):
+    try:
+        await prisma.counter.create(data={
+            "key": key,
+            "prefix": prefix,
+            "value": value
+        })
+    except UniqueViolationError:
+        pass
+
+
+async def delete_sequence(key: str):
+    await prisma.counter.delete_many(where={"key": key})
+
+
+def invoice_sequence_key(client_id: str) -> str:
+    return f"invoice:{client_id}"
+
+
+# seed a client's invoice counter, continuing after any existing invoices
+async def seed_invoice_sequence(client_id: str, account_number: Optional[str] = None):
+    value = 0
+    if account_number is None:
+        # Clients created before counters existed: backfill from their orders
+        client = await find_by_id("client", client_id)
+        if not client or not client.account_number:
+            raise LookupError("Client not found or missing account_number")
+        account_number = client.account_number
+
+        latest = await prisma.order.find_first(
+            where={"client_id": client_id},
+            order={"invoice_number": "desc"},
+        )
+        if latest and latest.invoice_number:
+            try:
+                value = int(latest.invoice_number.rsplit("-", 1)[-1])
+            except ValueError:
+                value = 0
+
+    await seed_sequence(invoice_sequence_key(client_id), account_number, value)
+
+
+# reserve `count` invoice numbers for a client, e.g. 2512345678-0042
+async def reserve_invoice_numbers(client_id: str, count: int = 1) -> list[str]:
+    key = invoice_sequence_key(client_id)
+    reserved = await reserve_sequence(key, count)
+    if reserved is None:
+        await seed_invoice_sequence(client_id)
+        reserved = await reserve_sequence(key, count)
+    if reserved is None:
+        raise LookupError("Client invoice sequence could not be created")
+
+    prefix, first, last = reserved
+    return [f"{prefix}-{n:04}" for n in range(first, last + 1)]
+
+
+# Account numbers are YY + a 10-digit suffix. Sequence index i maps to suffix
+# (i * ACCOUNT_MULTIPLIER + ACCOUNT_OFFSET) mod 10**10, a bijection because
+# the multiplier is coprime to 10**10, so numbers look random yet never repeat
+ACCOUNT_SPACE = 10**10
+ACCOUNT_MULTIPLIER = 7_919_180_013
+ACCOUNT_OFFSET = 3_141_592_653
+ACCOUNT_BLOCK_SIZE = 64
+
+
+class AccountNumberAllocator:
+    """
+    Hands out account numbers from blocks reserved on the `account:<yy>`
+    counter, so each worker touches the db once per `ACCOUNT_BLOCK_SIZE`
+    clients and never has to probe for uniqueness.
+    """
+
+    def __init__(self, block_size: int = ACCOUNT_BLOCK_SIZE):
+        self.block_size = block_size
+        self._year: Optional[str] = None
+        self._next = 0
+        self._end = 0  # exclusive
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def format(year: str, index: int) -> str:
+        suffix = (index * ACCOUNT_MULTIPLIER + ACCOUNT_OFFSET) % ACCOUNT_SPACE
+        return f"{year}{suffix:010}"
+
+    async def allocate(self, count: int = 1) -> list[str]:
+        year = datetime.now(timezone.utc).strftime("%y")
+        async with self._lock:
+            if year != self._year:
+                self._year, self._next, self._end = year, 0, 0
+
+            indexes = []
+            available = min(count, self._end - self._next)
+            indexes.extend(range(self._next, self._next + available))
+            self._next += available
+
+            missing = count - available
+            if missing:
+                # One reservation covers the rest plus a fresh block for later
+                first, last = await self._reserve(year, missing + self.block_size)
+                indexes.extend(range(first, first + missing))
+                self._next, self._end = first + missing, last + 1
+
+        return [self.format(year, index) for index in indexes]
+
+    async def _reserve(self, year: str, count: int) -> tuple[int, int]:
+        key = f"account:{year}"
+        reserved = await reserve_sequence(key, count)
+        if reserved is None:
+            await seed_sequence(key, year)
+            reserved = await reserve_sequence(key, count)
+        if reserved is None:
+            raise LookupError("Account number sequence could not be created")
+        # Counter values start at 1; indexes start at 0
+        _, first, last = reserved
+        return first - 1, last - 1
+
+
+account_numbers = AccountNumberAllocator()
@@ -0,0 +1,246 @@
+# app/utils/db/indexes.py
+#
+# Explains every hot query shape issued by app/utils/db/ and warns about
+# collection scans and in-memory sorts. Prisma's MongoDB engine reads with
+# `aggregate` pipelines ($match, then $sort/$skip/$limit), not `find`, so
+# each shape is explained as that pipeline; the planner can choose
+# differently for the two. Prisma has no raw command access on MongoDB, so
+# this talks to the server through `pymongo` (in requirements.txt, but only
+# imported here). Run with `python -m app.cli verify-indexes`, or at startup
+# by setting VERIFY_INDEXES=1, which refuses to start without pymongo.
+
+from datetime import datetime, timezone
+from typing import Any, Iterator, Optional
+
+from app.utils.commission import COMMISSIONABLE_STATUSES
+from app.utils.db.order import OPEN_ORDER_STATUSES
+from app.utils.envars import DATABASE_URL
+
+try:
+    from bson import ObjectId
+    from pymongo import MongoClient
+except ImportError:  # optional
+    MongoClient = None
+
+# Plan stages that mean an index is missing for the shape
+BAD_STAGES = {
+    "COLLSCAN": "collection scan",
+    "SORT": "in-memory sort",
+}
+
+
+def query_shapes() -> list[dict[str, Any]]:
+    """One representative filter and sort per query the db helpers issue."""
+    oid = ObjectId()
+    now = datetime.now(timezone.utc)
+    keyset_page = {
+        "$or": [
+            {"updated_at": {"$lt": now}},
+            {"updated_at": now, "_id": {"$lt": oid}},
+        ]
+    }
+
+    shapes = [{
+        "name": f"read_all_{name}s (page)",
+        "collection": collection,
+        "filter": keyset_page,
+        "sort": {"updated_at": -1, "_id": -1},
+    } for name, collection in (
+        ("associate", "Associate"),
+        ("client", "Client"),
+        ("order", "Order"),
+        ("product", "Product"),
+        ("lineitem", "LineItem"),
+    )]
+
+    # newest record of a list, for conditional GETs (app/utils/conditional.py)
+    shapes += [{
+        "name": f"read_list_stamp ({name})",
+        "collection": collection,
+        "filter": {},
+        "sort": {"updated_at": -1, "_id": -1},
+    } for name, collection in (
+        ("associate", "Associate"),
+        ("client", "Client"),
+        ("order", "Order"),
+        ("product", "Product"),
+    )]
+
+    assigned = {"$or": [
+        {"sales_associate_ids": oid},
+        {"tech_associate_ids": oid},
+    ]}
+    shapes += [
+        {
+            "name": "find_many_by_id (orders)",
+            "collection": "Order",
+            "filter": {"_id": {"$in": [oid]}},
+        },
+        {
+            "name": "find_many_by_id (clients)",
+            "collection": "Client",
+            "filter": {"_id": {"$in": [oid]}},
+        },
+        {
+            "name": "get_order_filter / read_visibility",
+            "collection": "Order",
+            "filter": assigned,
+        },
+        {
+            "name": "get_client_filter / read_visibility",
+            "collection": "Client",
+            "filter": assigned,
+        },
+        {
+            "name": "get_associate_by_username",
+            "collection": "Associate",
+            "filter": {"username": "username"},
+        },
+        {
+            "name": "typeahead_clients",
+            "collection": "Client",
+            "filter": {"$or": [
+                {"account_number": {"$regex": "^25"}},
+                {"email": {"$regex": "^ac"}},
+                {"contact_name_lc": {"$regex": "^ac"}},
+                {"business_name_lc": {"$regex": "^ac"}},
+            ]},
+        },
+        {
+            "name": "typeahead_associates",
+            "collection": "Associate",
+            "filter": {"$or": [
+                {"username": {"$regex": "^ac"}},
+                {"name_lc": {"$regex": "^ac"}},
+            ]},
+        },
+        {
+            "name": "write_clients (email dedupe)",
+            "collection": "Client",
+            "filter": {"email": {"$in": ["name@example.com"]}},
+        },
+        {
+            "name": "reserve_sequence",
+            "collection": "Counter",
+            "filter": {"key": "invoice:" + str(oid)},
+        },
+        {
+            "name": "seed_invoice_sequence",
+            "collection": "Order",
+            "filter": {"client_id": oid},
+            "sort": {"invoice_number": -1},
+        },
+        {
+            "name": "recompute_product_order_totals (line items)",
+            "collection": "LineItem",
+            "filter": {"product_id": oid},
+        },
+        {
+            "name": "recompute_order_totals (open orders)",
+            "collection": "Order",
+            "filter": {"status": {"$in": OPEN_ORDER_STATUSES}, "_id": {"$gt": oid}},
+            "sort": {"_id": 1},
+        },
+        {
+            "name": "close_commissions",
+            "collection": "Order",
+            "filter": {
+                "status": {"$in": COMMISSIONABLE_STATUSES},
+                "created_at": {"$gte": now, "$lt": now},
+                "_id": {"$gt": oid},
+            },
+            "sort": {"_id": 1},
+        },
+    ]
+    return shapes
+
+
+def _stages(plan: Any) -> Iterator[str]:
+    # Walks both classic and slot-based (`queryPlan`) explain output
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from _stages(value)
+
+
+def _winning_plans(explained: Any) -> Iterator[dict]:
+    # A pipeline pushed down whole is explained like a find; otherwise the
+    # query part sits under `stages[0]["$cursor"]`
+    if isinstance(explained, dict):
+        if "winningPlan" in explained:
+            yield explained["winningPlan"]
+        for value in explained.values():
+            yield from _winning_plans(value)
+    elif isinstance(explained, list):
+        for value in explained:
+            yield from _winning_plans(value)
+
+
+def shape_pipeline(shape: dict) -> list[dict]:
+    """The pipeline Prisma sends for a `find_many`/`find_first` of `shape`."""
+    pipeline = [{"$match": shape["filter"]}]
+    if shape.get("sort"):
+        pipeline.append({"$sort": shape["sort"]})
+    pipeline.append({"$limit": 51})
+    return pipeline
+
+
+def explain_shape(db, shape: dict) -> list[str]:
+    command = {"aggregate": shape["collection"],
+               "pipeline": shape_pipeline(shape),
+               "cursor": {}}
+    result = db.command("explain", command, verbosity="queryPlanner")
+    found = {BAD_STAGES[s]
+             for plan in _winning_plans(result)
+             for s in _stages(plan) if s in BAD_STAGES}
+    # A $sort left in the pipeline, not pushed into the query, runs in memory
+    if any("$sort" in stage for stage in result.get("stages", [])):
+        found.add(BAD_STAGES["SORT"])
+    return sorted(found)
+
+
+def require_pymongo():
+    if MongoClient is None:
+        raise RuntimeError("VERIFY_INDEXES is set but pymongo is not installed; "
+                           "pip install -r requirements.txt")
+
+
+def verify_indexes(url: Optional[str] = None) -> dict:
+    """Explain every query shape; returns `{shape name: [problems]}` for bad ones."""
+    if MongoClient is None:
+        return {"failure": {"type": "missing", "msg": "pymongo is not installed"}}
+
+    client = MongoClient(url or DATABASE_URL, serverSelectionTimeoutMS=5000)
+    shapes = query_shapes()
+    try:
+        db = client.get_default_database()
+        problems = {}
+        for shape in shapes:
+            found = explain_shape(db, shape)
+            if found:
+                problems[shape["name"]] = found
+    except Exception as e:
+        return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
+    finally:
+        client.close()
+
+    return {"success": {"checked": len(shapes), "problems": problems}}
+
+
+def report_indexes() -> bool:
+    """Print the verification result; True when every shape is index-backed."""
+    result = verify_indexes()
+    if "failure" in result:
+        print(f"⚠️ Index check skipped: {result['failure']['msg']}")
+        return False
+
+    problems = result["success"]["problems"]
+    for name, found in problems.items():
+        print(f"⚠️ {name}: {', '.join(found)}")
+    if not problems:
+        print(f"✅ {result['success']['checked']} query shapes are index-backed")
+    return not problems
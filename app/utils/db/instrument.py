@@ -0,0 +1,110 @@
+# app/utils/db/instrument.py
+
+import json
+import time
+from collections import Counter
+from contextvars import ContextVar, Token
+from typing import Any, Awaitable, Optional
+
+from app.utils.envars import DB_N_PLUS_ONE_THRESHOLD
+
+_stats: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats",
+                                                        default=None)
+
+
+def query_shape(model: str, method: str, arguments: Any) -> str:
+    """`Order.find_unique {"where": {"id": "?"}}`: the query minus its values."""
+
+    def strip(value):
+        if isinstance(value, dict):
+            return {k: strip(v) for k, v in value.items() if v is not None}
+        if isinstance(value, (list, tuple)):
+            # `{"in": [...]}` has one shape however many ids it carries
+            return [strip(value[0])] if value else []
+        return "?"
+
+    return f"{model}.{method} {json.dumps(strip(arguments), sort_keys=True)}"
+
+
+class QueryStats:
+    """Counts and times every Prisma model action made during one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.by_action: Counter[str] = Counter()
+        self.by_shape: Counter[str] = Counter()
+
+    def record(self, model: str, method: str, arguments: Any, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        self.by_action[f"{model}.{method}"] += 1
+        self.by_shape[query_shape(model, method, arguments)] += 1
+
+    def record_batch(self, actions: list[tuple[str, str]], seconds: float):
+        # One round trip however many writes it carries; not an N+1 either way
+        self.count += 1
+        self.seconds += seconds
+        for model, method in actions:
+            self.by_action[f"{model}.{method} (batch)"] += 1
+
+    @property
+    def ms(self) -> float:
+        return round(self.seconds * 1000, 1)
+
+    def repeated_shapes(self) -> dict[str, int]:
+        """Shapes issued often enough in one request to suggest an N+1 loop."""
+        return {
+            shape: count
+            for shape, count in self.by_shape.most_common()
+            if count >= DB_N_PLUS_ONE_THRESHOLD
+        }
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "queries": self.count,
+            "ms": self.ms,
+            "actions": dict(self.by_action.most_common()),
+            "n_plus_one": self.repeated_shapes(),
+        }
+
+
+def use_query_stats() -> Token:
+    return _stats.set(QueryStats())
+
+
+def reset_query_stats(token: Token):
+    _stats.reset(token)
+
+
+def get_query_stats() -> Optional[QueryStats]:
+    return _stats.get()
+
+
+def model_name(model: Any) -> str:
+    # Partial models (e.g. `OrderListRow`) report their base model
+    return getattr(model, "__prisma_model__", None) or getattr(
+        model, "__name__", "raw")
+
+
+async def timed(method: str, arguments: Any, model: Any, query: Awaitable):
+    stats = _stats.get()
+    if stats is None:
+        return await query
+    start = time.perf_counter()
+    try:
+        return await query
+    finally:
+        stats.record(model_name(model), method, arguments,
+                     time.perf_counter() - start)
+
+
+async def timed_batch(actions: list[tuple[str, str]], commit: Awaitable):
+    stats = _stats.get()
+    if stats is None:
+        return await commit
+    start = time.perf_counter()
+    try:
+        return await commit
+    finally:
+        stats.record_batch(actions, time.perf_counter() - start)
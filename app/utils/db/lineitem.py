@@ -1,19 +1,37 @@
 # app/utils/db/lineitem.py
 
+from app.utils.db.loader import clear_loaded, find_by_id, prime_loaded
+from app.utils.db.order import recompute_order_totals
+from app.utils.db.routing import mark_write
 from app.utils.format import encode_id
+from app.utils.pagination import build_page, build_page_query
 from app.utils.prisma import prisma
 from app.utils.security import generate_salt
 from app.utils.validators.id import validate_id58_to_id
 
 
+# recompute totals of the orders a line item belongs to
+async def recompute_lineitem_orders(order_ids: list[str]):
+    if not order_ids:
+        return {"success": {"orders": 0, "updated": 0}}
+    return await recompute_order_totals({"id": {"in": list(set(order_ids))}})
+
+
 # read all/filtered lineitem records
-async def read_all_lineitems(where={}):
+async def read_all_lineitems(where={}, page=None):
     try:
-        lineitems = await prisma.lineitem.find_many(
-            where=where, order={"updated_at": "desc"})
+        if page is None:
+            lineitems = await prisma.lineitem.find_many(where=where,
+                                                        order={"updated_at": "desc"})
+        else:
+            lineitems = await prisma.lineitem.find_many(
+                **build_page_query(where, page))
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
 
+    if page is not None:
+        lineitems, page = build_page(lineitems, page)
+
     # Prepare separate id58 mapping
     id58_by_id = {
         lineitem.id: encode_id(lineitem.id)
@@ -24,6 +42,7 @@ async def read_all_lineitems(where={}):
         "success": {
             "lineitems": lineitems,
             "id58_by_id": id58_by_id,
+            "page": page,
         }
     }
 
@@ -41,7 +60,7 @@ async def read_one_lineitem(id58):
     id = result["success"]["id"]
 
     try:
-        lineitem = await prisma.lineitem.find_unique(where={"id": id})
+        lineitem = await find_by_id("lineitem", id)
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
     if not lineitem:
@@ -55,9 +74,15 @@ async def create_lineitem(data):
     data["salt"] = generate_salt()
     try:
         lineitem = await prisma.lineitem.create(data=data)
+        prime_loaded("lineitem", lineitem)
+        mark_write()
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
 
+    result = await recompute_lineitem_orders(lineitem.order_ids)
+    if "failure" in result:
+        return result
+
     return {"success": {"lineitem": lineitem, "id58": encode_id(lineitem.id)}}
 
 
@@ -74,9 +99,20 @@ async def update_lineitem(id58, data):
     id = result["success"]["id"]
 
     try:
+        before = await find_by_id("lineitem", id)
         lineitem = await prisma.lineitem.update(where={"id": id}, data=data)
+        prime_loaded("lineitem", lineitem)
+        mark_write()
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
+    if not lineitem:
+        return {"failure": {"type": "not_found", "msg": "Lineitem not found"}}
+
+    # Orders the line item left need recomputing as well as its current ones
+    result = await recompute_lineitem_orders(
+        [*(before.order_ids if before else []), *lineitem.order_ids])
+    if "failure" in result:
+        return result
 
     return {"success": {"lineitem": lineitem, "id58": encode_id(lineitem.id)}}
 
@@ -95,8 +131,15 @@ async def delete_lineitem(id58):
     id = result["success"]["id"]
 
     try:
-        await prisma.lineitem.delete(where={"id": id})
+        lineitem = await prisma.lineitem.delete(where={"id": id})
+        clear_loaded("lineitem", id)
+        mark_write()
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
 
+    if lineitem:
+        result = await recompute_lineitem_orders(lineitem.order_ids)
+        if "failure" in result:
+            return result
+
     return {"success": True}
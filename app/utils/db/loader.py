@@ -0,0 +1,140 @@
+# app/utils/db/loader.py
+
+import asyncio
+from contextvars import ContextVar, Token
+from typing import Any, Optional
+
+from app.utils.prisma import prisma
+
+_registry: ContextVar[Optional["LoaderRegistry"]] = ContextVar(
+    "loader_registry", default=None)
+
+
+class Loader:
+    """
+    Per-request loader for one model. Every `load(id)` made in the same
+    event-loop tick is coalesced into a single `find_many(id in [...])`,
+    and results (including misses) are cached for the rest of the request.
+    """
+
+    def __init__(self, model: str):
+        self.model = model
+        self._cache: dict[str, asyncio.Future] = {}
+        self._pending: dict[str, asyncio.Future] = {}
+        # the loop only holds tasks weakly; keep each dispatch alive until done
+        self._dispatching: set[asyncio.Task] = set()
+
+    def _future_for(self, id: str) -> asyncio.Future:
+        future = self._cache.get(id)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._cache[id] = future
+        if not self._pending:
+            # First id this tick: dispatch once the tick's other loads are queued
+            loop.call_soon(self._schedule)
+        self._pending[id] = future
+        return future
+
+    async def load(self, id: str) -> Any:
+        # Shield so one cancelled caller doesn't cancel the shared future
+        return await asyncio.shield(self._future_for(id))
+
+    async def load_many(self, ids: list[str]) -> list[Any]:
+        return list(await asyncio.gather(*(self.load(id) for id in ids)))
+
+    def _schedule(self):
+        task = asyncio.ensure_future(self._dispatch())
+        self._dispatching.add(task)
+        task.add_done_callback(self._dispatching.discard)
+
+    async def _dispatch(self):
+        batch, self._pending = self._pending, {}
+        try:
+            records = await getattr(prisma, self.model).find_many(
+                where={"id": {"in": list(batch)}})
+        except BaseException as e:
+            # Cancelled too: every waiting `load` must still be resolved
+            error = e if isinstance(e, Exception) else RuntimeError(
+                f"{self.model} load was cancelled")
+            for id, future in batch.items():
+                # Don't cache failures; a later load may retry
+                self._cache.pop(id, None)
+                if not future.done():
+                    future.set_exception(error)
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        by_id = {record.id: record for record in records}
+        for id, future in batch.items():
+            if not future.done():
+                future.set_result(by_id.get(id))
+
+    def prime(self, record: Any):
+        """Seed the cache with a record fetched (or written) some other way."""
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(record)
+        self._cache[record.id] = future
+
+    def clear(self, id: str):
+        self._cache.pop(id, None)
+
+
+class LoaderRegistry:
+
+    def __init__(self):
+        self._loaders: dict[str, Loader] = {}
+
+    def __getitem__(self, model: str) -> Loader:
+        loader = self._loaders.get(model)
+        if loader is None:
+            loader = self._loaders[model] = Loader(model)
+        return loader
+
+
+def use_loaders() -> Token:
+    """Install a fresh loader registry for the current request."""
+    return _registry.set(LoaderRegistry())
+
+
+def reset_loaders(token: Token):
+    _registry.reset(token)
+
+
+def get_loader(model: str) -> Optional[Loader]:
+    registry = _registry.get()
+    return registry[model] if registry is not None else None
+
+
+# find one record by id, batched and cached when a request registry is active
+async def find_by_id(model: str, id: str):
+    loader = get_loader(model)
+    if loader is None:
+        return await getattr(prisma, model).find_unique(where={"id": id})
+    return await loader.load(id)
+
+
+# find many records by id, preserving order and dropping misses
+async def find_many_by_id(model: str, ids: list[str]) -> list:
+    loader = get_loader(model)
+    if loader is None:
+        records = await getattr(prisma, model).find_many(
+            where={"id": {"in": list(ids)}})
+        by_id = {record.id: record for record in records}
+        return [by_id[id] for id in ids if id in by_id]
+    return [record for record in await loader.load_many(ids) if record]
+
+
+def prime_loaded(model: str, record: Any):
+    loader = get_loader(model)
+    if loader is not None and record is not None:
+        loader.prime(record)
+
+
+def clear_loaded(model: str, id: str):
+    loader = get_loader(model)
+    if loader is not None:
+        loader.clear(id)
@@ -1,18 +1,42 @@
 # app/utils/db/order.py
 
+from prisma_client.partials import OrderListRow
+
+from app.utils.acl import assigned_ids, invalidate_acl
+from app.utils.db.counter import reserve_invoice_numbers
+from app.utils.db.loader import clear_loaded, find_by_id, find_many_by_id, prime_loaded
+from app.utils.db.routing import mark_write, read_client
 from app.utils.format import encode_id
+from app.utils.pagination import build_page, build_page_query, iter_id_chunks
 from app.utils.prisma import prisma
+from app.utils.search import search_index
+from app.utils.totals import compute_totals_batch
 from app.utils.validators.id import validate_id58_to_id
 
+# Orders whose totals may still change when a product price changes;
+# anything invoiced or settled keeps the amounts it was issued with
+OPEN_ORDER_STATUSES = ["pending", "on_hold"]
+
 
 # read all/filtered order records
-async def read_all_orders(where={}):
+async def read_all_orders(where={}, page=None, slim=False, secondary=False):
+    # `slim` selects only the columns declared by `order/all.jinja`
+    # `secondary` lets list views read from the replica, if configured
+    db = read_client(secondary)
+    orders_db = OrderListRow.prisma(db) if slim else db.order
     try:
-        orders = await prisma.order.find_many(where=where,
-                                              order={"updated_at": "desc"})
+        if page is None:
+            orders = await orders_db.find_many(where=where,
+                                               order={"updated_at": "desc"})
+        else:
+            orders = await orders_db.find_many(
+                **build_page_query(where, page))
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
 
+    if page is not None:
+        orders, page = build_page(orders, page)
+
     # Prepare separate id58 mapping
     id58_by_id = {order.id: encode_id(order.id) for order in orders}
 
@@ -20,12 +44,30 @@ async def read_all_orders(where={}):
         "success": {
             "orders": orders,
             "id58_by_id": id58_by_id,
+            "page": page,
         }
     }
 
 
-# read one order record
-async def read_one_order(id58):
+# relation profiles for `read_one_order(id58, include=...)`
+ORDER_INCLUDES = {
+    # everything `order/show.jinja` renders
+    "detail": {
+        "client": True,
+        "audited_by": True,
+        "sales_associates": True,
+        "tech_associates": True,
+        "lineitems": {
+            "include": {
+                "product": True
+            }
+        },
+    },
+}
+
+
+# read one order record, with relations when `include` names a profile
+async def read_one_order(id58, include=None):
     result = await validate_id58_to_id(id58)
     if "failure" in result:
         return {
@@ -37,7 +79,12 @@ async def read_one_order(id58):
     id = result["success"]["id"]
 
     try:
-        order = await prisma.order.find_unique(where={"id": id})
+        if include:
+            # Related records arrive with the order in a single engine request
+            order = await prisma.order.find_unique(
+                where={"id": id}, include=ORDER_INCLUDES[include])
+        else:
+            order = await find_by_id("order", id)
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
     if not order:
@@ -46,77 +93,62 @@ async def read_one_order(id58):
     return {"success": {"order": order, "id58": encode_id(order.id)}}
 
 
+# build the `create` payload for an order, connecting its relations
+def build_order_data(data: dict, invoice_number: str) -> dict:
+    order_data = {
+        "invoice_number": invoice_number,
+        "status": data["status"],
+        "sales_tax": data["sales_tax"],
+        "total_due": 0,
+        "transaction_fee": 0,
+        "revenue": 0,
+        "audited_at": data.get("audited_at"),
+        "audit_notes": data.get("audit_notes") or "",
+        "client": {
+            "connect": {
+                "id": data["client_id"]
+            }
+        },
+        "sales_associates": {
+            "connect": [{
+                "id": id
+            } for id in data.get("sales_associate_ids", [])]
+        },
+        "tech_associates": {
+            "connect": [{
+                "id": id
+            } for id in data.get("tech_associate_ids", [])]
+        },
+    }
+
+    # Only add if present
+    if data.get("audited_by_id"):
+        order_data["audited_by"] = {
+            "connect": {
+                "id": data["audited_by_id"]
+            }
+        }
+
+    return order_data
+
+
 # create a new order record
 async def create_order(data: dict):
     client_id = data["client_id"]
 
     try:
-        # Step 1: Look up latest order for this client (sorted by invoice_number descending)
-        latest = await prisma.order.find_first(
-            where={"client_id": client_id},
-            order={"invoice_number": "desc"},
-        )
-
-        # Step 2: Extract numeric suffix and increment
-        if latest and latest.invoice_number:
-            base_prefix = latest.invoice_number.rsplit("-", 1)[0]
-            suffix_str = latest.invoice_number.rsplit("-", 1)[-1]
-            try:
-                suffix_int = int(suffix_str)
-            except ValueError:
-                suffix_int = 0
-        else:
-            # default prefix from client account_number
-            client = await prisma.client.find_unique(where={"id": client_id})
-            if not client or not client.account_number:
-                return {
-                    "failure": {
-                        "type": "db",
-                        "msg": "Client not found or missing account_number",
-                    }
-                }
-            base_prefix = client.account_number
-            suffix_int = 0
-
-        # Step 3: Format new invoice number
-        new_suffix = f"{suffix_int + 1:04}"
-        invoice_number = f"{base_prefix}-{new_suffix}"
-
-        order_data = {
-            "invoice_number": invoice_number,
-            "status": data["status"],
-            "sales_tax": data["sales_tax"],
-            "total_due": 0,
-            "transaction_fee": 0,
-            "revenue": 0,
-            "audited_at": data["audited_at"],
-            "audit_notes": data.get("audit_notes") or "",
-            "client": {
-                "connect": {
-                    "id": client_id
-                }
-            },
-            "sales_associates": {
-                "connect": [{
-                    "id": id
-                } for id in data.get("sales_associate_ids", [])]
-            },
-            "tech_associates": {
-                "connect": [{
-                    "id": id
-                } for id in data.get("tech_associate_ids", [])]
-            },
-        }
+        # One atomic increment of the client's counter; no read-then-write race
+        try:
+            [invoice_number] = await reserve_invoice_numbers(client_id)
+        except LookupError as e:
+            return {"failure": {"type": "db", "msg": str(e)}}
 
-        # Only add if present
-        if data.get("audited_by_id"):
-            order_data["audited_by"] = {
-                "connect": {
-                    "id": data["audited_by_id"]
-                }
-            }
-
-        order = await prisma.order.create(data=order_data)
+        order = await prisma.order.create(
+            data=build_order_data(data, invoice_number))
+        prime_loaded("order", order)
+        search_index.upsert("order", order)
+        mark_write()
+        invalidate_acl(assigned_ids(order))
 
         return {"success": {"order": order, "id58": encode_id(order.id)}}
 
@@ -146,7 +178,19 @@ async def update_order(id58, data):
     id = result["success"]["id"]
 
     try:
+        # the totals inputs and assignments before the update
+        before = await find_by_id("order", id)
         order = await prisma.order.update(where={"id": id}, data=data)
+        if order and order.status in OPEN_ORDER_STATUSES and (
+                before is None
+                or before.sales_tax != order.sales_tax
+                or before.lineitem_ids != order.lineitem_ids):
+            # closed orders keep the totals they were billed with
+            [order], _ = await apply_order_totals([order])
+        prime_loaded("order", order)
+        search_index.upsert("order", order)
+        mark_write()
+        invalidate_acl(assigned_ids(before, order))
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
 
@@ -167,8 +211,78 @@ async def delete_order(id58):
     id = result["success"]["id"]
 
     try:
-        await prisma.order.delete(where={"id": id})
+        order = await prisma.order.delete(where={"id": id})
+        clear_loaded("order", id)
+        search_index.remove("order", id)
+        mark_write()
+        invalidate_acl(assigned_ids(order))
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
 
     return {"success": True}
+
+
+# recompute totals for loaded orders, storing only those that changed
+async def apply_order_totals(orders: list) -> tuple[list, int]:
+    lineitem_ids = list({id for order in orders for id in order.lineitem_ids})
+    lineitems = await find_many_by_id("lineitem",
+                                      lineitem_ids) if lineitem_ids else []
+    product_ids = list({lineitem.product_id for lineitem in lineitems})
+    products = await find_many_by_id("product",
+                                     product_ids) if product_ids else []
+
+    lineitem_by_id = {lineitem.id: lineitem for lineitem in lineitems}
+    price_by_id = {product.id: product.unit_price for product in products}
+
+    # Flatten to parallel arrays for the batch computation
+    order_index, qty, unit_price = [], [], []
+    for j, order in enumerate(orders):
+        for lineitem_id in order.lineitem_ids:
+            lineitem = lineitem_by_id.get(lineitem_id)
+            if lineitem and lineitem.product_id in price_by_id:
+                order_index.append(j)
+                qty.append(lineitem.qty)
+                unit_price.append(price_by_id[lineitem.product_id])
+    totals = compute_totals_batch(order_index, qty, unit_price,
+                                  [order.sales_tax for order in orders])
+
+    changed = [(j, t) for j, (order, t) in enumerate(zip(orders, totals))
+               if any(getattr(order, k) != v for k, v in t.items())]
+    if changed:
+        # One round trip for the whole chunk
+        async with prisma.batch_() as batcher:
+            for j, t in changed:
+                batcher.order.update(where={"id": orders[j].id}, data=t)
+        orders = list(orders)
+        for j, t in changed:
+            orders[j] = orders[j].model_copy(update=t)
+
+    return orders, len(changed)
+
+
+# recompute and store totals for all orders matching `where`
+async def recompute_order_totals(where: dict, chunk_size: int = 500):
+    seen = updated = 0
+    try:
+        async for orders in iter_id_chunks(prisma.order, where, chunk_size):
+            _, count = await apply_order_totals(orders)
+            seen += len(orders)
+            updated += count
+    except Exception as e:
+        return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
+
+    return {"success": {"orders": seen, "updated": updated}}
+
+
+# recompute open orders that bill `product_id`, e.g. after a price change
+async def recompute_product_order_totals(product_id: str):
+    return await recompute_order_totals({
+        "lineitems": {
+            "some": {
+                "product_id": product_id
+            }
+        },
+        "status": {
+            "in": OPEN_ORDER_STATUSES
+        },
+    })
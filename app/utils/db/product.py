@@ -1,18 +1,35 @@
 # app/utils/db/product.py
 
+from prisma_client.partials import ProductListRow
+
+from app.utils.db.loader import clear_loaded, find_by_id, prime_loaded
+from app.utils.db.order import recompute_product_order_totals
+from app.utils.db.routing import mark_write, read_client
 from app.utils.format import encode_id
+from app.utils.pagination import build_page, build_page_query
 from app.utils.prisma import prisma
 from app.utils.validators.id import validate_id58_to_id
 
 
 # read all/filtered product records
-async def read_all_products(where={}):
+async def read_all_products(where={}, page=None, slim=False, secondary=False):
+    # `slim` selects only the columns declared by `product/all.jinja`
+    # `secondary` lets list views read from the replica, if configured
+    db = read_client(secondary)
+    products_db = ProductListRow.prisma(db) if slim else db.product
     try:
-        products = await prisma.product.find_many(where=where,
-                                                  order={"updated_at": "desc"})
+        if page is None:
+            products = await products_db.find_many(where=where,
+                                                   order={"updated_at": "desc"})
+        else:
+            products = await products_db.find_many(
+                **build_page_query(where, page))
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
 
+    if page is not None:
+        products, page = build_page(products, page)
+
     # Prepare separate id58 mapping
     id58_by_id = {product.id: encode_id(product.id) for product in products}
 
@@ -20,6 +37,7 @@ async def read_all_products(where={}):
         "success": {
             "products": products,
             "id58_by_id": id58_by_id,
+            "page": page,
         }
     }
 
@@ -37,7 +55,7 @@ async def read_one_product(id58):
     id = result["success"]["id"]
 
     try:
-        product = await prisma.product.find_unique(where={"id": id})
+        product = await find_by_id("product", id)
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
     if not product:
@@ -50,6 +68,8 @@ async def read_one_product(id58):
 async def create_product(data):
     try:
         product = await prisma.product.create(data=data)
+        prime_loaded("product", product)
+        mark_write()
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
 
@@ -70,9 +90,16 @@ async def update_product(id58, data):
 
     try:
         product = await prisma.product.update(where={"id": id}, data=data)
+        prime_loaded("product", product)
+        mark_write()
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
 
+    if product and "unit_price" in data:
+        result = await recompute_product_order_totals(product.id)
+        if "failure" in result:
+            return result
+
     return {"success": {"product": product, "id58": encode_id(product.id)}}
 
 
@@ -91,6 +118,8 @@ async def delete_product(id58):
 
     try:
         await prisma.product.delete(where={"id": id})
+        clear_loaded("product", id)
+        mark_write()
     except Exception as e:
         return {"failure": {"type": "db", "msg": f"Database error: {str(e)}"}}
 
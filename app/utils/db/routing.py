@@ -0,0 +1,55 @@
+# app/utils/db/routing.py
+
+import time
+from contextvars import ContextVar, Token
+from typing import Optional
+
+from app.utils.envars import READ_YOUR_WRITES_SECONDS
+from app.utils.prisma import prisma, replica
+
+# session key holding the time of the session's last write
+WROTE_AT_KEY = "wrote_at"
+
+
+class ReadRouting:
+    """Per-request routing state: pinned requests read the primary only."""
+
+    def __init__(self, pinned: bool = False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_routing: ContextVar[Optional[ReadRouting]] = ContextVar("read_routing",
+                                                         default=None)
+
+
+def use_read_routing(wrote_at: Optional[float]) -> Token:
+    pinned = bool(wrote_at) and time.time() - wrote_at < READ_YOUR_WRITES_SECONDS
+    return _routing.set(ReadRouting(pinned))
+
+
+def reset_read_routing(token: Token):
+    _routing.reset(token)
+
+
+def wrote_this_request() -> bool:
+    routing = _routing.get()
+    return routing is not None and routing.wrote
+
+
+def mark_write():
+    """Pin the rest of this request, and the session's next few, to the primary."""
+    routing = _routing.get()
+    if routing is not None:
+        routing.wrote = True
+        routing.pinned = True
+
+
+# the client a read should use; `secondary` opts in to the replica
+def read_client(secondary: bool = False):
+    if not secondary or replica is None:
+        return prisma
+    routing = _routing.get()
+    if routing is not None and routing.pinned:
+        return prisma
+    return replica
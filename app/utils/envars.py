@@ -19,3 +19,69 @@ ENV_MODE = get_envar("ENV_MODE", "production")
 DATABASE_URL = get_envar("DATABASE_URL", "")
 SESSION_SECRET = get_envar("SESSION_SECRET", "")
 AUTH_STATUS = get_envar("AUTH_STATUS", "")
+
+# Process-wide cache for rarely-changing reference data (app/utils/db/cache.py)
+CACHE_TTL_SECONDS = float(get_envar("CACHE_TTL_SECONDS", "30"))
+CACHE_STALE_SECONDS = float(get_envar("CACHE_STALE_SECONDS", "120"))
+CACHE_MAX_ENTRIES = int(get_envar("CACHE_MAX_ENTRIES", "256"))
+
+# How long a worker trusts an associate's cached visibility (app/utils/acl.py)
+# before re-reading it; its own writes drop the cache immediately
+ACL_CACHE_TTL_SECONDS = float(get_envar("ACL_CACHE_TTL_SECONDS", "30"))
+
+# Payment processor fee charged on each order's total (app/utils/totals.py)
+TRANSACTION_FEE_BPS = int(get_envar("TRANSACTION_FEE_BPS", "290"))
+TRANSACTION_FEE_CENTS = int(get_envar("TRANSACTION_FEE_CENTS", "30"))
+
+# Commission pools as basis points of order revenue (app/utils/commission.py)
+SALES_COMMISSION_BPS = int(get_envar("SALES_COMMISSION_BPS", "1000"))
+TECH_COMMISSION_BPS = int(get_envar("TECH_COMMISSION_BPS", "500"))
+
+# Explain the db helpers' query shapes at startup (app/utils/db/indexes.py)
+VERIFY_INDEXES = get_envar("VERIFY_INDEXES", "") in ("1", "true")
+
+# Same-shaped queries per request that get flagged as a likely N+1 loop
+DB_N_PLUS_ONE_THRESHOLD = int(get_envar("DB_N_PLUS_ONE_THRESHOLD", "3"))
+
+# Prisma engine transport, per uvicorn worker (app/utils/prisma.py)
+DB_POOL_SIZE = int(get_envar("DB_POOL_SIZE", "20"))  # Mongo maxPoolSize
+DB_CONNECT_TIMEOUT_MS = int(get_envar("DB_CONNECT_TIMEOUT_MS", "10000"))
+DB_HTTP_MAX_CONNECTIONS = int(get_envar("DB_HTTP_MAX_CONNECTIONS", "100"))
+DB_HTTP_KEEPALIVE = int(get_envar("DB_HTTP_KEEPALIVE", "20"))
+DB_HTTP_TIMEOUT_SECONDS = float(get_envar("DB_HTTP_TIMEOUT_SECONDS", "30"))
+DB_CONNECT_RETRIES = int(get_envar("DB_CONNECT_RETRIES", "5"))
+DB_WARMUP = get_envar("DB_WARMUP", "1") in ("1", "true")
+
+# Optional secondary-preferred replica for list views, exports and reports
+# (app/utils/db/routing.py), and how long a session reads the primary after
+# writing so it sees its own changes
+DATABASE_READ_URL = get_envar("DATABASE_READ_URL", "")
+READ_YOUR_WRITES_SECONDS = float(get_envar("READ_YOUR_WRITES_SECONDS", "5"))
+
+# Response compression (app/middleware/compression.py): codings in order of
+# preference (br needs the optional brotli package; empty turns it off),
+# their levels, and the smallest body worth compressing
+COMPRESSION_ENCODINGS = get_envar("COMPRESSION_ENCODINGS", "br,gzip")
+COMPRESSION_GZIP_LEVEL = int(get_envar("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(get_envar("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_MIN_BYTES = int(get_envar("COMPRESSION_MIN_BYTES", "1024"))
+
+# Limits on form POST bodies (app/middleware/form_data.py)
+FORM_MAX_BYTES = int(get_envar("FORM_MAX_BYTES", str(1024 * 1024)))
+FORM_MAX_FIELDS = int(get_envar("FORM_MAX_FIELDS", "1000"))
+
+# How often each worker rebuilds its in-process search index from the db, to
+# pick up other workers' writes and bulk imports (app/utils/search.py); 0
+# builds once at startup
+SEARCH_REBUILD_SECONDS = float(get_envar("SEARCH_REBUILD_SECONDS", "600"))
+
+# Server-side sessions (app/middleware/sessions.py); the cookie only holds a
+# signed session id. SESSION_BACKEND: memory, sqlite, redis or fakeredis
+SESSION_BACKEND = get_envar("SESSION_BACKEND", "sqlite")
+SESSION_SQLITE_PATH = get_envar("SESSION_SQLITE_PATH", ".sessions.sqlite3")
+SESSION_REDIS_URL = get_envar("SESSION_REDIS_URL", "redis://localhost:6379/0")
+SESSION_MEMORY_MAX_ENTRIES = int(get_envar("SESSION_MEMORY_MAX_ENTRIES", "10000"))
+SESSION_MAX_AGE = int(get_envar("SESSION_MAX_AGE", str(14 * 24 * 60 * 60)))
+# sessions in use have their expiry pushed out at most this often
+SESSION_REFRESH_SECONDS = int(get_envar("SESSION_REFRESH_SECONDS", str(60 * 60)))
+SESSION_HTTPS_ONLY = get_envar("SESSION_HTTPS_ONLY", "") in ("1", "true")
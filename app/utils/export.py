@@ -0,0 +1,137 @@
+# app/utils/export.py
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, Optional
+
+from app.utils.db.routing import read_client
+from app.utils.importer import LIST_SEPARATOR
+from app.utils.pagination import iter_id_chunks
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+EXPORT_CHUNK_SIZE = 500
+
+# Scalar columns that may be exported, in default order
+EXPORT_COLUMNS = {
+    "order": [
+        "id",
+        "invoice_number",
+        "status",
+        "sales_tax",
+        "total_due",
+        "transaction_fee",
+        "revenue",
+        "sales_commission",
+        "tech_commission",
+        "company_cut",
+        "stripe_payment_intent_id",
+        "stripe_invoice_id",
+        "stripe_status",
+        "audited_at",
+        "audit_notes",
+        "audited_by_id",
+        "client_id",
+        "sales_associate_ids",
+        "tech_associate_ids",
+        "created_at",
+        "updated_at",
+    ],
+    "client": [
+        "id",
+        "account_number",
+        "status",
+        "contact_name",
+        "email",
+        "phone",
+        "business_name",
+        "street_address_1",
+        "street_address_2",
+        "city",
+        "state",
+        "zip_code",
+        "sales_associate_ids",
+        "tech_associate_ids",
+        "created_at",
+        "updated_at",
+    ],
+}
+
+
+def parse_columns(model: str, columns: Optional[str]) -> list[str]:
+    """Validate a comma-separated `columns` param against `EXPORT_COLUMNS`."""
+    allowed = EXPORT_COLUMNS[model]
+    if not columns:
+        return allowed
+    selected = [c.strip() for c in columns.split(",") if c.strip()]
+    unknown = [c for c in selected if c not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown {model} columns: {', '.join(unknown)}")
+    return list(dict.fromkeys(selected))
+
+
+def _cell(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def write_csv(records: list, columns: list[str], header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    for record in records:
+        row = []
+        for column in columns:
+            value = _cell(getattr(record, column))
+            if isinstance(value, list):
+                value = LIST_SEPARATOR.join(value)  # matches the importer
+            row.append("" if value is None else value)
+        writer.writerow(row)
+    return buffer.getvalue()
+
+
+def write_ndjson(records: list, columns: list[str], header: bool = False) -> str:
+    return "".join(
+        json.dumps({column: _cell(getattr(record, column))
+                    for column in columns}) + "\n" for record in records)
+
+
+WRITERS = {
+    "csv": write_csv,
+    "ndjson": write_ndjson,
+}
+
+
+async def export_records(model: str,
+                         fmt: str,
+                         where: Optional[dict],
+                         columns: list[str],
+                         gzip: bool = False) -> AsyncIterator[bytes]:
+    """Stream `model` records as CSV/NDJSON bytes, one chunk in memory at a time."""
+    write = WRITERS[fmt]
+    compressor = zlib.compressobj(wbits=31) if gzip else None  # 31: gzip container
+
+    def encode(text: str) -> bytes:
+        data = text.encode()
+        return compressor.compress(data) if compressor else data
+
+    # The CSV header goes out even when no records match
+    if fmt == "csv":
+        yield encode(write([], columns, header=True))
+
+    # Exports are long scans; keep them off the primary when a replica exists
+    actions = getattr(read_client(secondary=True), model)
+    async for records in iter_id_chunks(actions, where, EXPORT_CHUNK_SIZE):
+        data = encode(write(records, columns))
+        if data:
+            yield data
+
+    if compressor:
+        yield compressor.flush()
@@ -8,7 +8,7 @@ from app.middleware.form_data import try_parse_date_like_field
 def parse_record(record: Any) -> dict[str, Any]:
     """
     Convert a Pydantic model (e.g. Prisma `Associate`) to dict format
-    compatible with `FormDataMiddleware` for use in form components.
+    compatible with `get_form` for use in form components.
     """
     if hasattr(record, "model_dump"):
         record = record.model_dump()
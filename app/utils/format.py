@@ -1,9 +1,12 @@
 # app/utils/format.py
 
 import re
+from datetime import datetime, timedelta, timezone
 
 import base58
 
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
 
 def strip_ansi(text: str) -> str:
     return re.sub(r"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])", "", text)
@@ -19,6 +22,54 @@ def decode_id58(id58: str) -> str:
     return base58.b58decode(id58).hex()
 
 
+# Encode a keyset position (updated_at, ObjectId) as an opaque base58 cursor
+def encode_cursor(updated_at: datetime, id: str) -> str:
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    # Mongo stores dates with millisecond precision
+    millis = (updated_at - EPOCH) // timedelta(milliseconds=1)
+    raw = millis.to_bytes(8, "big", signed=True) + bytes.fromhex(id)
+    return base58.b58encode(raw).decode()
+
+
+# Decode a base58 cursor back to its (updated_at, ObjectId string) position
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    raw = base58.b58decode(cursor)
+    if len(raw) != 20:
+        raise ValueError("Invalid cursor")
+    millis = int.from_bytes(raw[:8], "big", signed=True)
+    return EPOCH + timedelta(milliseconds=millis), raw[8:].hex()
+
+
+# Option label for a client, as the order forms show it
+def client_label(client) -> str:
+    label = client.contact_name
+    if client.business_name:
+        label += f" ({client.business_name})"
+    return f"{label} [{client.account_number}]"
+
+
+# Option label for an associate, as the order forms show it
+def associate_label(associate) -> str:
+    label = associate.username
+    if associate.name:
+        label += f" ({associate.name})"
+    return label
+
+
+# Lowercased copy of a name, stored as `<field>_lc` so typeaheads can match
+# an indexable, case-sensitive prefix instead of an unindexable /i regex
+def lowercase_key(value):
+    return value.strip().lower() if value else None
+
+
+def with_lowercase_keys(data: dict, fields: tuple[str, ...]) -> dict:
+    for field in fields:
+        if field in data:
+            data[f"{field}_lc"] = lowercase_key(data[field])
+    return data
+
+
 def force_string_to_list(v):
     if isinstance(v, str):
         return [v]
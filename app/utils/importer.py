@@ -0,0 +1,318 @@
+# app/utils/importer.py
+
+import asyncio
+import codecs
+import csv
+import json
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Optional
+
+from pydantic import BaseModel, ValidationError
+
+from app.utils.acl import assigned_ids, invalidate_acl
+from app.utils.db.client import CLIENT_NAME_FIELDS, clients_cache
+from app.utils.db.counter import reserve_invoice_numbers
+from app.utils.db.order import build_order_data
+from app.utils.format import with_lowercase_keys
+from app.utils.prisma import prisma
+from app.utils.security import generate_account_numbers
+from app.utils.validators.client import ClientFormSchema
+from app.utils.validators.order import OrderFormSchema
+from app.utils.validators.product import ProductFormSchema
+
+IMPORT_FORMATS = ("csv", "ndjson")
+IMPORT_CHUNK_SIZE = 500
+IMPORT_CONCURRENCY = 16  # order creates in flight per chunk
+MAX_RECORD_LENGTH = 1 << 20  # characters; guards against a missing newline
+MAX_REPORTED_ERRORS = 100
+
+# Multi-value CSV cells, e.g. `sales_associate_ids` = "id1|id2"
+LIST_SEPARATOR = "|"
+LIST_FIELDS = {"sales_associate_ids", "tech_associate_ids"}
+
+SCHEMAS: dict[str, type[BaseModel]] = {
+    "client": ClientFormSchema,
+    "product": ProductFormSchema,
+    "order": OrderFormSchema,
+}
+
+
+class ImportReport:
+    """Running counts for one import; only the first errors are kept."""
+
+    def __init__(self, model: str):
+        self.model = model
+        self.rows = 0
+        self.created = 0
+        self.failed = 0
+        self.errors: list[dict] = []
+        self.started = time.monotonic()
+
+    def fail(self, row: int, errors: list[dict]):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "errors": errors})
+
+    def snapshot(self, done: bool = False) -> dict[str, Any]:
+        elapsed = time.monotonic() - self.started
+        return {
+            "model": self.model,
+            "done": done,
+            "rows": self.rows,
+            "created": self.created,
+            "failed": self.failed,
+            "elapsed_s": round(elapsed, 3),
+            "rows_per_s": round(self.rows / elapsed, 1) if elapsed else None,
+            **({"errors": self.errors} if done else {}),
+        }
+
+
+def _error(msg: str, field: str = "__global__") -> list[dict]:
+    return [{"field": field, "msg": msg}]
+
+
+#
+# STREAM PARSING
+#
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines, holding at most one partial line."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    async for chunk in chunks:
+        lines = (tail + decoder.decode(chunk)).split("\n")
+        tail = lines.pop()
+        if len(tail) > MAX_RECORD_LENGTH:
+            raise ValueError(f"Line exceeds {MAX_RECORD_LENGTH} characters")
+        for line in lines:
+            yield line.rstrip("\r")
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail.rstrip("\r")
+
+
+async def iter_csv_rows(lines: AsyncIterable[str]) -> AsyncIterator[tuple]:
+    header: Optional[list[str]] = None
+    pending: list[str] = []
+    quotes = 0
+    row = 0
+    async for line in lines:
+        pending.append(line)
+        # A quoted cell may span lines; the record ends once quotes balance
+        quotes += line.count('"')
+        if quotes % 2:
+            if sum(map(len, pending)) > MAX_RECORD_LENGTH:
+                raise ValueError(f"Record exceeds {MAX_RECORD_LENGTH} characters")
+            continue
+        record, pending, quotes = "\n".join(pending), [], 0
+        if not record.strip():
+            continue
+
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+
+        row += 1
+        if len(values) != len(header):
+            yield row, None, _error(
+                f"Expected {len(header)} columns, got {len(values)}")
+            continue
+
+        data: dict[str, Any] = {}
+        for name, value in zip(header, values):
+            if not value.strip():
+                continue  # like form posts, empty cells are omitted
+            if name in LIST_FIELDS:
+                value = [v.strip() for v in value.split(LIST_SEPARATOR) if v.strip()]
+            data[name] = value
+        yield row, data, None
+
+    if pending:
+        yield row + 1, None, _error("Unterminated quoted field")
+
+
+async def iter_ndjson_rows(lines: AsyncIterable[str]) -> AsyncIterator[tuple]:
+    row = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield row, None, _error(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(data, dict):
+            yield row, None, _error("Expected a JSON object")
+            continue
+        yield row, data, None
+
+
+def iter_rows(fmt: str, chunks: AsyncIterable[bytes]) -> AsyncIterator[tuple]:
+    """Yield `(row, data, errors)` for every record of a CSV/NDJSON stream."""
+    lines = iter_lines(chunks)
+    if fmt == "csv":
+        return iter_csv_rows(lines)
+    if fmt == "ndjson":
+        return iter_ndjson_rows(lines)
+    raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def validate_row(schema: type[BaseModel], data: dict) -> tuple:
+    try:
+        return schema(**data).model_dump(exclude_none=True), None
+    except ValidationError as e:
+        return None, [{
+            "field": ".".join(str(part) for part in error["loc"]) or "__global__",
+            "msg": error["msg"],
+        } for error in e.errors()]
+
+
+#
+# CHUNK WRITERS
+#
+def _fail_all(rows: list[tuple[int, dict]], report: ImportReport, e: Exception):
+    for row, _ in rows:
+        report.fail(row, _error(f"Database error: {str(e)}"))
+
+
+async def _create_many(actions, rows: list[tuple[int, dict]], report: ImportReport):
+    try:
+        report.created += await actions.create_many(
+            data=[data for _, data in rows])
+    except Exception as e:
+        _fail_all(rows, report, e)
+
+
+async def write_clients(rows: list[tuple[int, dict]], report: ImportReport):
+    # `email` is unique: drop duplicates up front so one bad row can't sink
+    # the whole `create_many`
+    emails = [data["email"] for _, data in rows]
+    try:
+        existing = await prisma.client.find_many(where={"email": {"in": emails}})
+    except Exception as e:
+        _fail_all(rows, report, e)
+        return
+    taken = {client.email for client in existing}
+
+    fresh = []
+    for row, data in rows:
+        if data["email"] in taken:
+            report.fail(row, _error("Email already exists", "email"))
+            continue
+        taken.add(data["email"])
+        fresh.append((row, data))
+    if not fresh:
+        return
+
+    try:
+        numbers = await generate_account_numbers(len(fresh))
+    except Exception as e:
+        _fail_all(fresh, report, e)
+        return
+    for (_, data), number in zip(fresh, numbers):
+        data["account_number"] = number
+        with_lowercase_keys(data, CLIENT_NAME_FIELDS)
+
+    await _create_many(prisma.client, fresh, report)
+    clients_cache.invalidate()
+    # imported clients carry no assignments: no visibility changes
+
+
+async def write_products(rows: list[tuple[int, dict]], report: ImportReport):
+    await _create_many(prisma.product, rows, report)
+
+
+async def write_orders(rows: list[tuple[int, dict]], report: ImportReport):
+    # Relations have to be connected per order, so orders can't use
+    # `create_many`; reserve invoice numbers per client in one round trip each
+    by_client: dict[str, list[tuple[int, dict]]] = {}
+    for row, data in rows:
+        by_client.setdefault(data["client_id"], []).append((row, data))
+
+    reserved = await asyncio.gather(
+        *(reserve_invoice_numbers(client_id, len(group))
+          for client_id, group in by_client.items()),
+        return_exceptions=True,
+    )
+
+    pending = []
+    for group, numbers in zip(by_client.values(), reserved):
+        if isinstance(numbers, Exception):
+            msg = (str(numbers) if isinstance(numbers, LookupError) else
+                   f"Database error: {str(numbers)}")
+            for row, _ in group:
+                report.fail(row, _error(msg, "client_id"))
+            continue
+        pending.extend((row, build_order_data(data, number))
+                       for (row, data), number in zip(group, numbers))
+
+    semaphore = asyncio.Semaphore(IMPORT_CONCURRENCY)
+
+    assigned = set()
+
+    async def create(row: int, order_data: dict):
+        async with semaphore:
+            try:
+                order = await prisma.order.create(data=order_data)
+            except Exception as e:
+                report.fail(row, _error(f"Database error: {str(e)}"))
+                return
+        report.created += 1
+        assigned.update(assigned_ids(order))
+
+    await asyncio.gather(*(create(row, order_data) for row, order_data in pending))
+    invalidate_acl(assigned)
+
+
+WRITERS = {
+    "client": write_clients,
+    "product": write_products,
+    "order": write_orders,
+}
+
+
+#
+# ENTRY POINT
+#
+async def import_records(model: str,
+                         fmt: str,
+                         chunks: AsyncIterable[bytes],
+                         chunk_size: int = IMPORT_CHUNK_SIZE) -> AsyncIterator[dict]:
+    """
+    Stream-import `model` rows from a CSV/NDJSON byte stream. Rows are
+    validated and written `chunk_size` at a time, yielding a progress
+    snapshot after each chunk and a final report (with errors) at the end.
+    """
+    if model not in SCHEMAS:
+        raise ValueError(f"Unsupported import model: {model}")
+    schema, write = SCHEMAS[model], WRITERS[model]
+    report = ImportReport(model)
+
+    async def flush(batch: list[tuple]):
+        valid = []
+        for row, data, errors in batch:
+            if errors is None:
+                data, errors = validate_row(schema, data)
+            if errors:
+                report.fail(row, errors)
+            else:
+                valid.append((row, data))
+        if valid:
+            await write(valid, report)
+
+    batch: list[tuple] = []
+    try:
+        async for record in iter_rows(fmt, chunks):
+            report.rows += 1
+            batch.append(record)
+            if len(batch) >= chunk_size:
+                await flush(batch)
+                batch = []
+                yield report.snapshot()
+    except (ValueError, csv.Error) as e:
+        report.fail(report.rows + 1, _error(str(e)))
+    if batch:
+        await flush(batch)
+
+    yield report.snapshot(done=True)
@@ -0,0 +1,127 @@
+# app/utils/pagination.py
+
+from typing import Any, AsyncIterator, Optional
+
+from fastapi import Request
+
+from app.utils.format import decode_cursor, encode_cursor
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def clamp_page_size(limit: Any) -> int:
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        limit = DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def get_page_params(request: Request) -> dict[str, Any]:
+    """Read the `after` / `before` / `limit` query params of a list view."""
+    params = request.query_params
+    return {
+        "after": params.get("after") or None,
+        "before": params.get("before") or None,
+        "limit": clamp_page_size(params.get("limit", DEFAULT_PAGE_SIZE)),
+    }
+
+
+def _decode_or_none(cursor: Optional[str]):
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except Exception:
+        # A malformed cursor falls back to the first page
+        return None
+
+
+def build_page_query(where: Optional[dict], page: dict) -> dict[str, Any]:
+    """
+    Return `find_many` kwargs for one keyset page ordered by
+    `(updated_at, id)` descending. One extra row is fetched to detect
+    whether another page exists in the direction of travel.
+    """
+    limit = clamp_page_size(page.get("limit"))
+    backward = bool(page.get("before"))
+    position = _decode_or_none(page.get("before") or page.get("after"))
+
+    clauses = [where] if where else []
+    if position:
+        updated_at, id = position
+        op = "gt" if backward else "lt"
+        clauses.append({
+            "OR": [
+                {"updated_at": {op: updated_at}},
+                {"updated_at": updated_at, "id": {op: id}},
+            ]
+        })
+
+    if len(clauses) > 1:
+        query_where = {"AND": clauses}
+    else:
+        query_where = clauses[0] if clauses else {}
+
+    direction = "asc" if backward and position else "desc"
+    return {
+        "where": query_where,
+        "order": [{"updated_at": direction}, {"id": direction}],
+        "take": limit + 1,
+    }
+
+
+def build_page(records: list, page: dict) -> tuple[list, dict[str, Any]]:
+    """Trim the look-ahead row and compute next/prev cursors for a page."""
+    limit = clamp_page_size(page.get("limit"))
+    backward = bool(page.get("before")) and _decode_or_none(page["before"])
+    forward = bool(page.get("after")) and _decode_or_none(page["after"])
+
+    has_more = len(records) > limit
+    records = list(records[:limit])
+    if backward:
+        records.reverse()
+
+    if backward:
+        has_prev, has_next = has_more, True
+    elif forward:
+        has_prev, has_next = True, has_more
+    else:
+        has_prev, has_next = False, has_more
+
+    first = records[0] if records else None
+    last = records[-1] if records else None
+
+    return records, {
+        "limit": limit,
+        "prev": encode_cursor(first.updated_at, first.id)
+        if has_prev and first else None,
+        "next": encode_cursor(last.updated_at, last.id)
+        if has_next and last else None,
+    }
+
+
+async def iter_id_chunks(actions,
+                         where: Optional[dict],
+                         chunk_size: int = 500) -> AsyncIterator[list]:
+    """
+    Yield every record matching `where` a chunk at a time, keyset-paged on
+    `id`. Ids never change, so rows edited mid-scan are neither skipped
+    nor repeated (unlike paging on `updated_at`). Used by batch jobs.
+    """
+    last_id = None
+    while True:
+        clauses = [where] if where else []
+        if last_id:
+            clauses.append({"id": {"gt": last_id}})
+        records = await actions.find_many(
+            where={"AND": clauses} if clauses else {},
+            order={"id": "asc"},
+            take=chunk_size,
+        )
+        if records:
+            yield records
+        if len(records) < chunk_size:
+            return
+        last_id = records[-1].id
@@ -1,14 +1,192 @@
 # app/utils/prisma.py
 
+import asyncio
+import random
+from datetime import timedelta
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
 from prisma_client import Prisma, register
+from prisma_client.client import Batch
+from prisma_client.engine.errors import EngineConnectionError, NotConnectedError
+from prisma_client.errors import ClientNotConnectedError
+
+from app.utils.db.instrument import model_name, timed, timed_batch
+from app.utils.envars import (
+    DATABASE_READ_URL,
+    DATABASE_URL,
+    DB_CONNECT_RETRIES,
+    DB_CONNECT_TIMEOUT_MS,
+    DB_HTTP_KEEPALIVE,
+    DB_HTTP_MAX_CONNECTIONS,
+    DB_HTTP_TIMEOUT_SECONDS,
+    DB_POOL_SIZE,
+    DB_WARMUP,
+)
+
+# Safe to replay even if the engine died mid-request
+READ_METHODS = {
+    "find_unique",
+    "find_unique_or_raise",
+    "find_first",
+    "find_first_or_raise",
+    "find_many",
+    "count",
+    "group_by",
+}
+
+# Failures raised before the query reached the engine: any method may be replayed
+UNSENT_ERRORS = (
+    httpx.ConnectError,
+    EngineConnectionError,
+    NotConnectedError,
+    ClientNotConnectedError,
+)
+
+# The engine dropped the connection mid-query: it has gone away. Timeouts are
+# not in here: a slow query or a full pool says nothing about the engine, and
+# reconnecting would fail every other query in flight on it
+ENGINE_GONE_ERRORS = (
+    httpx.RemoteProtocolError,
+    httpx.ReadError,
+)
+
+# Models touched by the startup warmup
+WARMUP_MODELS = ("associate", "client", "product", "lineitem", "order", "counter")
+
+
+def pooled_url(url: str) -> str:
+    """Add Mongo pool/timeout options to `url` unless it already sets them."""
+    parts = urlsplit(url)
+    params = dict(parse_qsl(parts.query))
+    params.setdefault("maxPoolSize", str(DB_POOL_SIZE))
+    params.setdefault("connectTimeoutMS", str(DB_CONNECT_TIMEOUT_MS))
+    params.setdefault("serverSelectionTimeoutMS", str(DB_CONNECT_TIMEOUT_MS))
+    return urlunsplit(parts._replace(query=urlencode(params)))
+
+
+class InstrumentedBatch(Batch):
+    """
+    `batch_()` writes skip `_execute`: they are queued by `_add` and sent
+    together by `commit`. Count the commit as one query, listing its writes.
+    """
+
+    def __init__(self, client: Prisma):
+        super().__init__(client=client)
+        self._actions: list[tuple[str, str]] = []
+
+    def _add(self, **kwargs):
+        self._actions.append((model_name(kwargs.get("model")), kwargs.get("method")))
+        super()._add(**kwargs)
+
+    async def commit(self):
+        actions, self._actions = self._actions, []
+        await timed_batch(actions, super().commit())
+
+
+class InstrumentedPrisma(Prisma):
+    """
+    Every model action, including those of partial models, funnels through
+    `_execute`; time and count them for the current request, and reconnect
+    once if the query engine has gone away. Batches are counted by
+    `InstrumentedBatch`, and are not retried.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._reconnect_lock = asyncio.Lock()
+        self._generation = 0
+
+    async def _execute(self, *, method, arguments, model=None, root_selection=None):
+        generation = self._generation
+        try:
+            query = super()._execute(method=method,
+                                     arguments=arguments,
+                                     model=model,
+                                     root_selection=root_selection)
+            return await timed(method, arguments, model, query)
+        except (*ENGINE_GONE_ERRORS, *UNSENT_ERRORS) as e:
+            # A write may have been applied before the engine went away
+            if not (isinstance(e, UNSENT_ERRORS) or method in READ_METHODS):
+                raise
+            await self.reconnect(generation)
+            query = super()._execute(method=method,
+                                     arguments=arguments,
+                                     model=model,
+                                     root_selection=root_selection)
+            return await timed(method, arguments, model, query)
+
+    def batch_(self) -> InstrumentedBatch:
+        return InstrumentedBatch(client=self)
+
+    async def reconnect(self, generation: Optional[int] = None):
+        async with self._reconnect_lock:
+            # Concurrent failures share the first caller's reconnect
+            if generation is not None and generation != self._generation:
+                return
+            print("⚠️ Query engine unreachable, reconnecting")
+            if self.is_connected():
+                try:
+                    await self.disconnect()
+                except Exception:
+                    pass  # the engine is already gone
+            await connect_with_retry(self)
+            self._generation += 1
+
+
+def create_client(url: str) -> InstrumentedPrisma:
+    return InstrumentedPrisma(
+        datasource={"url": pooled_url(url)} if url else None,
+        connect_timeout=timedelta(milliseconds=DB_CONNECT_TIMEOUT_MS),
+        http={
+            "limits": httpx.Limits(max_connections=DB_HTTP_MAX_CONNECTIONS,
+                                   max_keepalive_connections=DB_HTTP_KEEPALIVE),
+            "timeout": DB_HTTP_TIMEOUT_SECONDS,
+        },
+    )
+
+
+prisma = create_client(DATABASE_URL)
+
+# Second query engine bound to the read URL; None when not configured
+replica = create_client(DATABASE_READ_URL) if DATABASE_READ_URL else None
+
+
+async def connect_with_retry(client: Prisma, retries: int = DB_CONNECT_RETRIES):
+    for attempt in range(retries + 1):
+        try:
+            await client.connect()
+            return
+        except Exception as e:
+            if attempt == retries:
+                raise
+            # Exponential backoff with jitter so workers don't retry in step
+            delay = min(0.5 * 2**attempt, 8) * random.uniform(0.5, 1)
+            print(f"⚠️ Prisma connect failed ({e}); retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
 
-prisma = Prisma()
+# touch every collection so the first real requests don't pay for cold connections
+async def warmup_prisma(client: Prisma):
+    await asyncio.gather(
+        *(getattr(client, model).find_first() for model in WARMUP_MODELS),
+        return_exceptions=True,
+    )
 
 
 async def connect_prisma():
-    await prisma.connect()
+    await connect_with_retry(prisma)
     register(prisma)  # Makes `from prisma import prisma` work globally
+    if replica:
+        await connect_with_retry(replica)
+    if DB_WARMUP:
+        await warmup_prisma(prisma)
+        if replica:
+            await warmup_prisma(replica)
 
 
 async def disconnect_prisma():
     await prisma.disconnect()
+    if replica:
+        await replica.disconnect()
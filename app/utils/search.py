@@ -0,0 +1,298 @@
+# app/utils/search.py
+#
+# In-process search over clients, associates and orders. Every searchable
+# field is lowercased and indexed by its trigrams, plus the 1- and 2-letter
+# prefixes of its words for short queries. A query intersects the posting
+# sets of its own trigrams (smallest first), then confirms each candidate
+# with a substring check, so cost tracks the rarest trigram rather than the
+# number of documents.
+#
+# Each worker holds its own index: the db helpers update it on every write,
+# and a periodic rebuild picks up writes made by other workers and imports.
+
+import asyncio
+import itertools
+import re
+import time
+from typing import AbstractSet, Any, Callable, Iterable, Iterator, Optional
+
+from prisma_client.partials import AssociateSearch, ClientSearch, OrderSearch
+
+from app.utils.envars import SEARCH_REBUILD_SECONDS
+from app.utils.pagination import iter_id_chunks
+from app.utils.prisma import prisma
+
+SEARCH_LIMIT = 20
+SEARCH_CHUNK_SIZE = 2000
+MIN_QUERY_LENGTH = 1
+
+# Candidates checked one by one before falling back to a full intersection
+PROBE_CANDIDATES = 200
+
+_SPACES = re.compile(r"\s+")
+_WORDS = re.compile(r"\w+")
+
+
+def normalize(text: Optional[str]) -> str:
+    return _SPACES.sub(" ", text or "").strip().lower()
+
+
+def trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def prefixes(text: str) -> set[str]:
+    return {word[:n] for word in _WORDS.findall(text) for n in (1, 2)}
+
+
+# Per-kind document builders: record -> (label, detail, searchable fields)
+def _client_document(client) -> tuple[str, str, list[Optional[str]]]:
+    return (
+        client.business_name or client.contact_name,
+        client.account_number,
+        [client.business_name, client.contact_name, client.email,
+         client.account_number],
+    )
+
+
+def _associate_document(associate) -> tuple[str, str, list[Optional[str]]]:
+    return (associate.name, associate.username,
+            [associate.name, associate.username])
+
+
+def _order_document(order) -> tuple[str, str, list[Optional[str]]]:
+    return (order.invoice_number, order.status, [order.invoice_number])
+
+
+DOCUMENTS: dict[str, Callable[[Any], tuple[str, str, list[Optional[str]]]]] = {
+    "client": _client_document,
+    "associate": _associate_document,
+    "order": _order_document,
+}
+
+# Rebuilds select only the fields the builders above read
+SEARCH_PARTIALS = {
+    "client": ClientSearch,
+    "associate": AssociateSearch,
+    "order": OrderSearch,
+}
+
+
+class TrigramIndex:
+    """Inverted index from trigrams and word prefixes to document slots."""
+
+    def __init__(self):
+        self._slots: dict[tuple[str, str], int] = {}
+        # slot -> (kind, id, label, detail, normalized fields)
+        self._docs: dict[int, tuple[str, str, str, str, tuple[str, ...]]] = {}
+        self._postings: dict[str, set[int]] = {}
+        self._next_slot = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        return key in self._slots
+
+    @staticmethod
+    def _grams(fields: Iterable[str]) -> set[str]:
+        grams: set[str] = set()
+        for field in fields:
+            grams |= trigrams(field)
+            grams |= prefixes(field)
+        return grams
+
+    def add(self, kind: str, id: str, label: str, detail: str,
+            fields: Iterable[Optional[str]]):
+        self.remove(kind, id)
+        normalized = tuple(f for f in map(normalize, fields) if f)
+        slot = self._next_slot
+        self._next_slot += 1
+        self._slots[(kind, id)] = slot
+        self._docs[slot] = (kind, id, label or "", detail or "", normalized)
+        for gram in self._grams(normalized):
+            self._postings.setdefault(gram, set()).add(slot)
+
+    def remove(self, kind: str, id: str):
+        slot = self._slots.pop((kind, id), None)
+        if slot is None:
+            return
+        _, _, _, _, normalized = self._docs.pop(slot)
+        for gram in self._grams(normalized):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(slot)
+                if not posting:
+                    del self._postings[gram]
+
+    def _candidates(self, query: str) -> Optional[list[set[int]]]:
+        if len(query) >= 3:
+            grams = trigrams(query)
+        else:
+            # Too short for a trigram: match it as a word prefix instead
+            grams = {query}
+        postings = []
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if not posting:
+                return None  # some gram appears nowhere
+            postings.append(posting)
+        return sorted(postings, key=len)
+
+    def search(self,
+               query: str,
+               kinds: Optional[Iterable[str]] = None,
+               allowed: Optional[dict[str, AbstractSet[str]]] = None,
+               limit: int = SEARCH_LIMIT) -> list[dict[str, str]]:
+        """
+        Documents whose fields contain `query`, up to `limit`. `allowed`
+        maps a kind to the ids the caller may see; kinds missing from it
+        are unrestricted.
+        """
+        query = normalize(query)
+        if len(query) < MIN_QUERY_LENGTH:
+            return []
+        postings = self._candidates(query)
+        if postings is None:
+            return []
+        kinds = set(kinds) if kinds else None
+        allowed = allowed or {}
+        smallest, rest = postings[0], postings[1:]
+
+        # A restricted caller may see fewer documents than the rarest gram
+        # matches; then walk their documents instead
+        if kinds is not None and kinds <= allowed.keys():
+            visible = {self._slots[key]
+                       for key in ((kind, id) for kind in kinds for id in allowed[kind])
+                       if key in self._slots}
+            if len(visible) < len(smallest):
+                smallest, rest = visible, postings
+
+        results: dict[int, dict[str, str]] = {}
+
+        def collect(slots: Iterable[int], check_rest: bool) -> bool:
+            for slot in slots:
+                if slot in results:
+                    continue
+                if check_rest and any(slot not in posting for posting in rest):
+                    continue
+                kind, id, label, detail, fields = self._docs[slot]
+                if kinds is not None and kind not in kinds:
+                    continue
+                if kind in allowed and id not in allowed[kind]:
+                    continue
+                if len(query) >= 3 and not any(query in field for field in fields):
+                    continue  # every trigram matched, but not contiguously
+                results[slot] = {"kind": kind, "id": id, "label": label,
+                                 "detail": detail}
+                if len(results) >= limit:
+                    return True
+            return False
+
+        # Dense matches fill `limit` within a short probe of the rarest
+        # posting; sparse ones are cheaper to intersect in C
+        probe = itertools.islice(smallest, PROBE_CANDIDATES)
+        if not collect(probe, True) and len(smallest) > PROBE_CANDIDATES:
+            if rest:
+                collect(smallest.intersection(*rest), False)
+            else:
+                collect(itertools.islice(smallest, PROBE_CANDIDATES, None), False)
+        return list(results.values())
+
+    def stats(self) -> dict[str, int]:
+        return {"documents": len(self._docs), "grams": len(self._postings)}
+
+
+class SearchIndex:
+    """
+    The live `TrigramIndex` plus its rebuilds. A rebuild fills a fresh
+    index in the background and swaps it in; writes that land meanwhile
+    go to both, and the rebuild skips the records they touched.
+    """
+
+    def __init__(self):
+        self.index = TrigramIndex()
+        self.ready = False
+        self.built_at: Optional[float] = None
+        self.build_ms: Optional[float] = None
+        self._next: Optional[TrigramIndex] = None
+        self._touched: set[tuple[str, str]] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def upsert(self, kind: str, record):
+        if record is None:
+            return
+        label, detail, fields = DOCUMENTS[kind](record)
+        for index in self._indexes():
+            index.add(kind, record.id, label, detail, fields)
+        if self._next is not None:
+            self._touched.add((kind, record.id))
+
+    def remove(self, kind: str, id: str):
+        for index in self._indexes():
+            index.remove(kind, id)
+        if self._next is not None:
+            self._touched.add((kind, id))
+
+    def _indexes(self) -> Iterator[TrigramIndex]:
+        yield self.index
+        if self._next is not None:
+            yield self._next
+
+    async def rebuild(self, chunk_size: int = SEARCH_CHUNK_SIZE):
+        started = time.perf_counter()
+        fresh = self._next = TrigramIndex()
+        self._touched = set()
+        try:
+            for kind, build in DOCUMENTS.items():
+                actions = SEARCH_PARTIALS[kind].prisma(prisma)
+                async for records in iter_id_chunks(actions, None, chunk_size):
+                    for record in records:
+                        if (kind, record.id) in self._touched:
+                            continue  # already written during the rebuild
+                        fresh.add(kind, record.id, *build(record))
+                    await asyncio.sleep(0)  # let requests in between chunks
+        finally:
+            self._next = None
+        self.index = fresh
+        self.ready = True
+        self.built_at = time.time()
+        self.build_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    def start(self):
+        """Build now, then every SEARCH_REBUILD_SECONDS, in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.rebuild()
+            except Exception as e:
+                print(f"⚠️ Search index rebuild failed: {str(e)}")
+            if SEARCH_REBUILD_SECONDS <= 0:
+                return
+            await asyncio.sleep(SEARCH_REBUILD_SECONDS)
+
+    def search(self, *args, **kwargs) -> list[dict[str, str]]:
+        return self.index.search(*args, **kwargs)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self.index.stats(),
+            "ready": self.ready,
+            "built_at": self.built_at,
+            "build_ms": self.build_ms,
+        }
+
+
+search_index = SearchIndex()
@@ -1,18 +1,13 @@
 # app/utils/security.py
 
 
-import random
 import secrets
 import hashlib
 import hmac
-from datetime import datetime, timezone
 from fastapi import Request
-from fastapi.responses import RedirectResponse
-from functools import wraps
-from typing import Callable, Union, Any
+from typing import Callable, Union
 
-from app.utils.prisma import prisma
-from app.utils.envars import AUTH_STATUS
+from app.utils.db.counter import account_numbers
 
 def has_role(request: Request, role: str) -> bool:
     associate_roles = request.session.get("roles", [])
@@ -21,45 +16,41 @@ def has_role(request: Request, role: str) -> bool:
 def is_admin(request: Request) -> bool:
     return has_role(request, "admin")
 
+# Route policy markers, compiled by app/middleware/security_gate.py; they
+# leave the handler itself unwrapped
 def require_role(roles: Union[str, list[str]]) -> Callable:
     if isinstance(roles, str):
         roles = [roles]
 
     def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        async def wrapper(request: Request, *args, **kwargs):
-            # Bypass role checks if auth is disabled
-            if AUTH_STATUS == "disabled":
-                return await func(request, *args, **kwargs)
-
-            user_roles = request.session.get("roles", [])
-            if not any(role in user_roles for role in roles):
-                request.session["flash"] = ["Access denied."]
-                return RedirectResponse("/", status_code=303)
-            return await func(request, *args, **kwargs)
-        return wrapper
+        func._required_roles = frozenset(roles)
+        return func
     return decorator
 
 
-def generate_salt(length: int = 32) -> str:
-    return secrets.token_hex(length // 2)  # 32 hex chars = 16 bytes
+def public(func: Callable) -> Callable:
+    """Reachable without logging in."""
+    func._public = True
+    return func
 
-async def generate_account_number(max_attempts: int = 10) -> str:
-    """Generate a unique account number with format YYXXXXXXXXXX (e.g., 251234567890)."""
-    year_prefix = datetime.now(timezone.utc).strftime("%y")
 
-    for _ in range(max_attempts):
-        suffix = f"{random.randint(0, 9999999999):010}"
-        account_number = f"{year_prefix}{suffix}"
+def reset_exempt(func: Callable) -> Callable:
+    """Reachable while a password reset is pending."""
+    func._reset_exempt = True
+    return func
 
-        # Check uniqueness in the database
-        existing = await prisma.client.find_unique(
-            where={"account_number": account_number})
-        if not existing:
-            return account_number
 
-    raise RuntimeError(
-        "Failed to generate a unique account number after multiple attempts.")
+def generate_salt(length: int = 32) -> str:
+    return secrets.token_hex(length // 2)  # 32 hex chars = 16 bytes
+
+async def generate_account_number() -> str:
+    """Allocate a unique account number with format YYXXXXXXXXXX (e.g., 251234567890)."""
+    [account_number] = await account_numbers.allocate()
+    return account_number
+
+async def generate_account_numbers(count: int) -> list[str]:
+    """Allocate `count` unique account numbers in at most one db round trip."""
+    return await account_numbers.allocate(count)
 
 def hash_password(password: str, salt: str) -> str:
     return hashlib.sha256((password + salt).encode()).hexdigest()
@@ -67,30 +58,3 @@ def hash_password(password: str, salt: str) -> str:
 def verify_password(password: str, hashed: str, salt: str) -> bool:
     return hmac.compare_digest(hash_password(password, salt), hashed)
 
-def get_client_filter(request: Request) -> dict[str, Any] | None:
-    """Return a Prisma-compatible `where` clause for filtering visible clients."""
-    if AUTH_STATUS == "disabled":
-        return None  # No filtering
-
-    if is_admin(request):
-        return None  # No filter — full access
-
-    sales_ids = request.session.get("sales_client_ids", [])
-    tech_ids = request.session.get("tech_client_ids", [])
-
-    client_ids = set(sales_ids) | set(tech_ids)
-    return {"id": {"in": list(client_ids)}} if client_ids else {"id": {"in": []}}  # force empty
-
-def get_order_filter(request: Request) -> dict[str, Any] | None:
-    """Return a Prisma-compatible `where` clause for filtering visible clients."""
-    if AUTH_STATUS == "disabled":
-        return None  # No filtering
-
-    if is_admin(request):
-        return None  # No filter — full access
-
-    sales_ids = request.session.get("sales_order_ids", [])
-    tech_ids = request.session.get("tech_order_ids", [])
-
-    order_ids = set(sales_ids) | set(tech_ids)
-    return {"id": {"in": list(order_ids)}} if order_ids else {"id": {"in": []}}  # force empty
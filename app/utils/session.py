@@ -10,12 +10,10 @@ async def create_session(request: Request, id58):
         return
     associate = result["success"]["associate"]
 
+    # a fresh session id on login, so a planted one can't be reused
+    request.session.regenerate()
     request.session["id58"] = result["success"]["id58"]
     request.session["roles"] = associate.roles
-    request.session["sales_client_ids"] = associate.sales_client_ids
-    request.session["tech_client_ids"] = associate.tech_client_ids
-    request.session["sales_order_ids"] = associate.sales_order_ids
-    request.session["tech_order_ids"] = associate.tech_order_ids
 
 def force_password_reset_required(request: Request):
     request.session["must_reset_password"] = True
@@ -0,0 +1,325 @@
+# app/utils/session_store.py
+#
+# Server-side session storage for app/middleware/sessions.py. The cookie
+# only carries a signed session id; the data lives in one of these stores,
+# picked by SESSION_BACKEND:
+#   memory     per-process LRU; sessions end on restart, one worker only
+#   sqlite     a local file shared by every worker on the host (default)
+#   redis      any Redis-protocol server at SESSION_REDIS_URL
+#   fakeredis  the redis store over an in-process fake, for development
+# Stores are async: the middleware awaits the load before the app runs and
+# the save (or a TTL refresh) when the response starts. Blocking work runs
+# off the event loop: sqlite in a thread, redis over an asyncio stream.
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import unquote, urlparse
+
+from app.utils.envars import (
+    SESSION_BACKEND,
+    SESSION_MEMORY_MAX_ENTRIES,
+    SESSION_REDIS_URL,
+    SESSION_SQLITE_PATH,
+)
+
+
+class SessionStore(ABC):
+    """Session data by id, as JSON, expiring `max_age` seconds after a save or touch."""
+
+    @abstractmethod
+    async def load(self, sid: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def save(self, sid: str, data: dict, max_age: int):
+        ...
+
+    @abstractmethod
+    async def touch(self, sid: str, max_age: int):
+        """Push the expiry out without rewriting the data."""
+
+    @abstractmethod
+    async def delete(self, sid: str):
+        ...
+
+    async def close(self):
+        pass
+
+
+class MemorySessionStore(SessionStore):
+
+    def __init__(self, maxsize: int = SESSION_MEMORY_MAX_ENTRIES):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    async def load(self, sid: str) -> Optional[dict]:
+        entry = self._entries.get(sid)
+        if entry is None:
+            return None
+        raw, expires = entry
+        if expires < time.time():
+            del self._entries[sid]
+            return None
+        self._entries.move_to_end(sid)
+        return json.loads(raw)
+
+    async def save(self, sid: str, data: dict, max_age: int):
+        # Stored as JSON so values behave as they do in the other stores
+        self._entries[sid] = (json.dumps(data), time.time() + max_age)
+        self._entries.move_to_end(sid)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def touch(self, sid: str, max_age: int):
+        entry = self._entries.get(sid)
+        if entry is not None:
+            self._entries[sid] = (entry[0], time.time() + max_age)
+
+    async def delete(self, sid: str):
+        self._entries.pop(sid, None)
+
+
+class SQLiteSessionStore(SessionStore):
+
+    # purge expired rows about once per this many saves
+    PURGE_EVERY = 1000
+
+    def __init__(self, path: str = SESSION_SQLITE_PATH):
+        self._db = sqlite3.connect(path, check_same_thread=False,
+                                   isolation_level=None)
+        self._lock = threading.Lock()
+        self._saves = 0
+        with self._lock:
+            # WAL: readers in other workers don't block on a writer
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " id TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL)")
+
+    # The blocking halves run in a worker thread; the lock serializes them
+    # on the shared connection
+
+    def _load(self, sid: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data FROM sessions WHERE id = ? AND expires > ?",
+                (sid, time.time())).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _save(self, sid: str, data: str, max_age: int):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions (id, data, expires) VALUES (?, ?, ?)",
+                (sid, data, now + max_age))
+            self._saves += 1
+            if self._saves % self.PURGE_EVERY == 0:
+                self._db.execute("DELETE FROM sessions WHERE expires <= ?", (now,))
+
+    def _touch(self, sid: str, max_age: int):
+        with self._lock:
+            self._db.execute("UPDATE sessions SET expires = ? WHERE id = ?",
+                             (time.time() + max_age, sid))
+
+    def _delete(self, sid: str):
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE id = ?", (sid,))
+
+    def _close(self):
+        with self._lock:
+            self._db.close()
+
+    async def load(self, sid: str) -> Optional[dict]:
+        return await asyncio.to_thread(self._load, sid)
+
+    async def save(self, sid: str, data: dict, max_age: int):
+        # Serialized here: `data` may change once the response is under way
+        await asyncio.to_thread(self._save, sid, json.dumps(data), max_age)
+
+    async def touch(self, sid: str, max_age: int):
+        await asyncio.to_thread(self._touch, sid, max_age)
+
+    async def delete(self, sid: str):
+        await asyncio.to_thread(self._delete, sid)
+
+    async def close(self):
+        await asyncio.to_thread(self._close)
+
+
+class RespClient:
+    """
+    Just enough of a Redis client for sessions: GET, SET EX, EXPIRE and DEL
+    over RESP2 on an asyncio stream. One connection, serialized by a lock,
+    redialed after an error. Any `redis.asyncio` compatible client can be
+    used in its place.
+    """
+
+    def __init__(self, url: str, timeout: float = 1.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            auth = [self.username, self.password] if self.username else [self.password]
+            await self._call("AUTH", *auth)
+        if self.db:
+            await self._call("SELECT", str(self.db))
+
+    async def _call(self, *args: str):
+        payload = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg.encode() if isinstance(arg, str) else arg
+            payload.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._writer.write(b"".join(payload))
+        await self._writer.drain()
+        return await self._read()
+
+    async def _read(self):
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise RuntimeError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            return (await self._reader.readexactly(length + 2))[:-2]
+        if kind == b"*":
+            return [await self._read() for _ in range(int(rest))]
+        raise ConnectionError(f"Unexpected reply: {line!r}")
+
+    async def _execute(self, *args: str):
+        if self._writer is None:
+            await self._connect()
+        return await self._call(*args)
+
+    async def execute(self, *args: str):
+        async with self._lock:
+            for attempt in range(2):
+                try:
+                    # A timed-out reply leaves the stream mid-message: redial
+                    return await asyncio.wait_for(self._execute(*args), self.timeout)
+                except (OSError, ConnectionError, asyncio.IncompleteReadError):
+                    self._drop()
+                    if attempt:
+                        raise
+
+    async def get(self, name: str) -> Optional[bytes]:
+        return await self.execute("GET", name)
+
+    async def set(self, name: str, value: str, ex: Optional[int] = None):
+        args = ["SET", name, value] + (["EX", str(ex)] if ex else [])
+        return await self.execute(*args)
+
+    async def expire(self, name: str, seconds: int) -> int:
+        return await self.execute("EXPIRE", name, str(seconds))
+
+    async def delete(self, *names: str) -> int:
+        return await self.execute("DEL", *names)
+
+    def _drop(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def close(self):
+        writer = self._writer
+        self._drop()
+        if writer is not None:
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+
+class FakeRedis:
+    """In-process stand-in for `RespClient` with the same commands."""
+
+    def __init__(self):
+        self._data: dict[str, tuple[bytes, Optional[float]]] = {}
+
+    async def get(self, name: str) -> Optional[bytes]:
+        entry = self._data.get(name)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires is not None and expires < time.time():
+            del self._data[name]
+            return None
+        return value
+
+    async def set(self, name: str, value: str, ex: Optional[int] = None):
+        value = value.encode() if isinstance(value, str) else value
+        self._data[name] = (value, time.time() + ex if ex else None)
+        return "OK"
+
+    async def expire(self, name: str, seconds: int) -> int:
+        value = await self.get(name)
+        if value is None:
+            return 0
+        self._data[name] = (value, time.time() + seconds)
+        return 1
+
+    async def delete(self, *names: str) -> int:
+        return sum(self._data.pop(name, None) is not None for name in names)
+
+    async def close(self):
+        pass
+
+
+class RedisSessionStore(SessionStore):
+
+    def __init__(self, client, prefix: str = "session:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def load(self, sid: str) -> Optional[dict]:
+        raw = await self.client.get(self.prefix + sid)
+        return json.loads(raw) if raw else None
+
+    async def save(self, sid: str, data: dict, max_age: int):
+        await self.client.set(self.prefix + sid, json.dumps(data), ex=max_age)
+
+    async def touch(self, sid: str, max_age: int):
+        await self.client.expire(self.prefix + sid, max_age)
+
+    async def delete(self, sid: str):
+        await self.client.delete(self.prefix + sid)
+
+    async def close(self):
+        await self.client.close()
+
+
+def create_session_store(backend: str = SESSION_BACKEND) -> SessionStore:
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    if backend == "redis":
+        return RedisSessionStore(RespClient(SESSION_REDIS_URL))
+    if backend == "fakeredis":
+        return RedisSessionStore(FakeRedis())
+    raise ValueError(f"Unsupported SESSION_BACKEND: {backend}")
+
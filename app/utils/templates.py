@@ -11,7 +11,11 @@ from starlette.templating import (
     TemplateResponse,  # <-- Note: using starlette directly
 )
 
+from app.utils.assets import static_url
+from app.utils.db.instrument import get_query_stats
+from app.utils.envars import ENV_MODE
 from app.utils.flash import get_flashes
+from app.utils.format import encode_id
 
 TEMPLATES_DIR: Final[str] = Path(
     __file__).resolve().parent.parent / "templates"
@@ -39,6 +43,12 @@ def format_date(value) -> str:
   return value.strftime('%Y-%m-%d')
 templates.env.filters["format_date"] = format_date
 
+# link related records, e.g. url_for('get_show_client', id58=order.client.id|id58)
+templates.env.filters["id58"] = encode_id
+
+# fingerprinted asset URLs, e.g. static_url('css/app.css')
+templates.env.globals["static_url"] = static_url
+
 def render(template_name: str,
            request: Request,
            extra_context: Optional[dict] = None) -> TemplateResponse:
@@ -54,4 +64,8 @@ def render(template_name: str,
     if extra_context:
         context.update(extra_context)
 
+    # Debug footer with this request's db queries so far
+    if ENV_MODE == "development":
+        context["db_stats"] = get_query_stats()
+
     return templates.TemplateResponse(template_name, context)
\ No newline at end of file
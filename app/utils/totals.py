@@ -0,0 +1,80 @@
+# app/utils/totals.py
+#
+# Order totals in integer cents (see app/schemas/order.py):
+#   subtotal        = sum(qty * unit_price) over the order's line items
+#   tax             = subtotal * sales_tax / 10000, rounded half up
+#                     (`sales_tax` is a percentage in hundredths, 825 = 8.25%)
+#   total_due       = subtotal + tax
+#   transaction_fee = total_due * TRANSACTION_FEE_BPS / 10000, rounded half up,
+#                     plus TRANSACTION_FEE_CENTS; nothing on a zero total
+#   revenue         = total_due - tax - transaction_fee
+
+from typing import Sequence
+
+from app.utils.envars import TRANSACTION_FEE_BPS, TRANSACTION_FEE_CENTS
+
+try:
+    import numpy as np
+except ImportError:  # optional; batches fall back to plain Python
+    np = None
+
+BPS = 10000
+
+# Below this many line items the numpy setup costs more than it saves
+NUMPY_MIN_ITEMS = 256
+
+
+def div_half_up(numerator: int, denominator: int) -> int:
+    """Integer division rounding halves up, for non-negative amounts."""
+    return (numerator + denominator // 2) // denominator
+
+
+def compute_totals(subtotal: int, sales_tax: int) -> dict[str, int]:
+    tax = div_half_up(subtotal * sales_tax, BPS)
+    total_due = subtotal + tax
+    fee = (div_half_up(total_due * TRANSACTION_FEE_BPS, BPS) +
+           TRANSACTION_FEE_CENTS) if total_due > 0 else 0
+    return {
+        "total_due": total_due,
+        "transaction_fee": fee,
+        "revenue": total_due - tax - fee,
+    }
+
+
+def compute_totals_batch(order_index: Sequence[int], qty: Sequence[int],
+                         unit_price: Sequence[int],
+                         sales_tax: Sequence[int]) -> list[dict[str, int]]:
+    """
+    Totals for many orders at once. Line item `i` belongs to order
+    `order_index[i]`; `sales_tax[j]` is order `j`'s rate. Orders without
+    line items get zero totals.
+    """
+    if np is not None and len(qty) >= NUMPY_MIN_ITEMS:
+        return _compute_totals_numpy(order_index, qty, unit_price, sales_tax)
+
+    subtotals = [0] * len(sales_tax)
+    for j, q, p in zip(order_index, qty, unit_price):
+        subtotals[j] += q * p
+    return [compute_totals(s, t) for s, t in zip(subtotals, sales_tax)]
+
+
+def _compute_totals_numpy(order_index, qty, unit_price, sales_tax):
+    # int64 throughout: exact for any realistic cent amount, unlike
+    # `np.bincount(weights=...)`, which sums in float64
+    subtotal = np.zeros(len(sales_tax), dtype=np.int64)
+    np.add.at(subtotal, np.asarray(order_index, dtype=np.intp),
+              np.asarray(qty, dtype=np.int64) * np.asarray(unit_price, dtype=np.int64))
+    rate = np.asarray(sales_tax, dtype=np.int64)
+
+    tax = (subtotal * rate + BPS // 2) // BPS
+    total_due = subtotal + tax
+    fee = np.where(total_due > 0,
+                   (total_due * TRANSACTION_FEE_BPS + BPS // 2) // BPS +
+                   TRANSACTION_FEE_CENTS, 0)
+    revenue = total_due - tax - fee
+
+    return [{
+        "total_due": int(t),
+        "transaction_fee": int(f),
+        "revenue": int(r),
+    } for t, f, r in zip(total_due.tolist(), fee.tolist(), revenue.tolist())]
@@ -5,6 +5,7 @@ from typing import Optional
 from fastapi import Request
 from pydantic import BaseModel, ValidationError, field_validator
 
+from app.middleware.form_data import get_form
 from app.schemas.client import (
     AccountStatusStr,
     BusinessNameStr,
@@ -66,7 +67,7 @@ class ClientFormSchema(BaseModel):
 # USE IN ROUTE HANDLERS
 #
 async def validate_client_form(form_name: str, request: Request) -> dict:
-    form = request.state.form
+    form = await get_form(request)
     try:
         if form_name == "new":
             parsed = ClientFormSchema(**form)
@@ -5,6 +5,7 @@ from typing import Optional
 from fastapi import Request
 from pydantic import BaseModel, ValidationError, field_validator, model_validator
 
+from app.middleware.form_data import get_form
 from app.schemas.lineitem import (
     BusinessNameStr,
     CityStr,
@@ -99,7 +100,7 @@ class LineitemFormSchema(BaseModel):
 # USE IN ROUTE HANDLERS
 #
 async def validate_lineitem_form(form_name: str, request: Request) -> dict:
-    form = request.state.form
+    form = await get_form(request)
     try:
         if form_name == "new":
             parsed = LineitemFormSchema(**form)
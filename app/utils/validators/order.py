@@ -6,6 +6,7 @@ from typing import List, Optional
 from fastapi import Request
 from pydantic import BaseModel, ValidationError, field_validator
 
+from app.middleware.form_data import get_form
 from app.schemas.order import (
     AssociateIdStr,
     AuditedAtDate,
@@ -86,7 +87,7 @@ class OrderFormSchema(BaseModel):
 # USE IN ROUTE HANDLERS
 #
 async def validate_order_form(form_name: str, request: Request) -> dict:
-    form = request.state.form
+    form = await get_form(request)
     try:
         if form_name == "new":
             parsed = OrderFormSchema(**form)
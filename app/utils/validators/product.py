@@ -6,6 +6,7 @@ from typing import Optional
 from fastapi import Request
 from pydantic import BaseModel, ValidationError, field_validator
 
+from app.middleware.form_data import get_form
 from app.schemas.product import (
     FullNameStr,
     ProductDescriptionStr,
@@ -56,7 +57,7 @@ class ProductFormSchema(BaseModel):
 # USE IN ROUTE HANDLERS
 #
 async def validate_product_form(form_name: str, request: Request) -> dict:
-    form = request.state.form
+    form = await get_form(request)
     try:
         if form_name == "new":
             parsed = ProductFormSchema(**form)
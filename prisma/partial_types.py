@@ -0,0 +1,75 @@
+# prisma/partial_types.py
+#
+# Run by `prisma generate` (see `partial_type_generator` in schema.prisma).
+# Builds one slim "list row" partial model per list view from the
+# `list_fields` declared at the top of `app/templates/<model>/all.jinja`,
+# so list pages only select the columns their template renders.
+
+from pathlib import Path
+
+from jinja2 import Environment, nodes
+from prisma_client.models import Associate, Client, Order, Product
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "app" / "templates"
+
+# Always selected: needed for id58 links and keyset cursors
+ROW_KEY_FIELDS = ("id", "updated_at")
+
+
+def read_list_fields(template_name: str) -> list[str]:
+    source = (TEMPLATES_DIR / template_name).read_text()
+    for node in Environment().parse(source).find_all(nodes.Assign):
+        if isinstance(node.target, nodes.Name) and node.target.name == "list_fields":
+            return list(node.node.as_const())
+    raise ValueError(f"{template_name} does not declare `list_fields`")
+
+
+for model, mod_name in (
+    (Associate, "associate"),
+    (Client, "client"),
+    (Order, "order"),
+    (Product, "product"),
+):
+    fields = read_list_fields(f"{mod_name}/all.jinja")
+    model.create_partial(
+        f"{model.__name__}ListRow",
+        include=list(dict.fromkeys([*ROW_KEY_FIELDS, *fields])),
+    )
+
+# Typeahead options: just what an option label needs (app/utils/format.py)
+Client.create_partial(
+    "ClientOption",
+    include=["id", "contact_name", "business_name", "account_number"],
+)
+Associate.create_partial(
+    "AssociateOption",
+    include=["id", "username", "name"],
+)
+
+# Names and their lowercased copies, for backfilling the copies
+# (`backfill_*_name_keys` in app/utils/db/)
+Client.create_partial(
+    "ClientNames",
+    include=["id", "contact_name", "contact_name_lc", "business_name",
+             "business_name_lc"],
+)
+Associate.create_partial("AssociateNames", include=["id", "name", "name_lc"])
+
+# Assignment fields only, for resolving visibility (app/utils/acl.py)
+for model in (Client, Order):
+    model.create_partial(
+        f"{model.__name__}Access",
+        include=["id", "sales_associate_ids", "tech_associate_ids"],
+    )
+
+# Newest change only, for list page validators (app/utils/conditional.py)
+for model in (Associate, Client, Order, Product):
+    model.create_partial(f"{model.__name__}Stamp", include=["id", "updated_at"])
+
+# Indexed fields only, for search index rebuilds (app/utils/search.py)
+Client.create_partial(
+    "ClientSearch",
+    include=["id", "business_name", "contact_name", "email", "account_number"],
+)
+Associate.create_partial("AssociateSearch", include=["id", "name", "username"])
+Order.create_partial("OrderSearch", include=["id", "invoice_number", "status"])
@@ -0,0 +1,4 @@
+#!/bin/bash
+source .venv/bin/activate
+echo "📦 Building fingerprinted static assets..."
+python -m app.utils.assets
@@ -0,0 +1,4 @@
+#!/bin/bash
+source .venv/bin/activate
+echo "⏱️ Benchmarking middleware overhead..."
+PYTHONPATH=. python scripts/bench_middleware.py "$@"
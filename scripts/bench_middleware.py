@@ -0,0 +1,229 @@
+# scripts/bench_middleware.py
+#
+# Per-request cost of the middleware stack on trivial routes, driving the
+# ASGI app directly (no server, no sockets):
+#   bare     the routes alone
+#   before   the stack as it was before the pure ASGI rewrite: Starlette's
+#            cookie SessionMiddleware, then form parsing, the password reset
+#            check and the login check as BaseHTTPMiddleware dispatches,
+#            with roles checked by a wrapper on the route (reconstructed
+#            below)
+#   after    the pure ASGI layers in app/main.py, sessions in memory
+# each for two requests:
+#   anonymous  GET /login, a public route: no session to load
+#   logged in  GET /client with a session cookie, through the login and
+#              role checks, so the session is loaded and read
+# Run from the repo root: ./scripts/bench.sh [requests]
+
+import asyncio
+import json
+import sys
+import time
+from base64 import b64encode
+from functools import wraps
+
+from itsdangerous import TimestampSigner
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.responses import PlainTextResponse, RedirectResponse
+from starlette.routing import Route
+
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.form_data import FormDataMiddleware, try_parse_date_like_field
+from app.middleware.loaders import LoaderMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.middleware.read_routing import ReadRoutingMiddleware
+from app.middleware.security_gate import SecurityGateMiddleware
+from app.middleware.sessions import ServerSessionMiddleware
+from app.utils.assets import STATIC_URL
+from app.utils.envars import AUTH_STATUS, SESSION_MAX_AGE
+from app.utils.security import public, require_role, reset_exempt
+from app.utils.session_store import MemorySessionStore
+
+SECRET = "bench"
+SESSION = {"id58": "bench", "roles": ["sales"]}
+SID = "bench-session"
+
+LAYERS = [
+    CompressionMiddleware,
+    QueryStatsMiddleware,
+    ServerSessionMiddleware,
+    FormDataMiddleware,
+    SecurityGateMiddleware,
+    LoaderMiddleware,
+    ReadRoutingMiddleware,
+]
+
+
+#
+# BEFORE: the old layers, as they were
+#
+class BaselineFormData(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        form = await request.form()
+        parsed_form = {}
+        for key in form.keys():
+            processed = [
+                try_parse_date_like_field(key, v)
+                for v in form.getlist(key)
+                if v is not None and v.strip()
+            ]
+            if processed:
+                parsed_form[key] = processed if len(processed) > 1 else processed[0]
+        request.state.form = parsed_form
+        return await call_next(request)
+
+
+class BaselinePasswordResetRequired(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        session = request.session
+        if not session.get("id58") or not session.get("must_reset_password"):
+            return await call_next(request)
+        exempt_paths = {"/auth/set-password", "/logout", "/static", "/login"}
+        if any(request.url.path.startswith(exempt) for exempt in exempt_paths):
+            return await call_next(request)
+        return RedirectResponse("/auth/set-password", status_code=303)
+
+
+class BaselineAuthRequired(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        if AUTH_STATUS == "disabled":
+            return await call_next(request)
+        public_paths = ["/login", "/logout", "/static"]
+        if any(request.url.path.startswith(p) for p in public_paths):
+            return await call_next(request)
+        if not request.session.get("id58"):
+            request.session["flash"] = ["Please log in to continue."]
+            return RedirectResponse("/login", status_code=303)
+        return await call_next(request)
+
+
+def baseline_require_role(roles: list[str]):
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(request, *args, **kwargs):
+            if AUTH_STATUS == "disabled":
+                return await func(request, *args, **kwargs)
+            user_roles = request.session.get("roles", [])
+            if not any(role in user_roles for role in roles):
+                request.session["flash"] = ["Access denied."]
+                return RedirectResponse("/", status_code=303)
+            return await func(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+BASELINE_LAYERS = [
+    Middleware(SessionMiddleware, secret_key=SECRET),
+    Middleware(BaselineFormData),
+    Middleware(BaselinePasswordResetRequired),
+    Middleware(BaselineAuthRequired),
+]
+
+
+#
+# ROUTES
+#
+@public
+@reset_exempt
+async def login(request):
+    return PlainTextResponse("pong")
+
+
+async def clients(request):
+    return PlainTextResponse("clients")
+
+
+async def build(stack: str) -> tuple[Starlette, str]:
+    """The app, and the session cookie a logged-in request sends to it."""
+    signer = TimestampSigner(SECRET)
+    if stack == "before":
+        endpoint = baseline_require_role(["admin", "sales", "tech"])(clients)
+        middleware = BASELINE_LAYERS
+        # Starlette's cookie holds the session data itself
+        cookie = signer.sign(b64encode(json.dumps(SESSION).encode())).decode()
+    else:
+        endpoint = require_role(["admin", "sales", "tech"])(clients)
+        middleware = []
+        store = MemorySessionStore()
+        await store.save(SID, SESSION, SESSION_MAX_AGE)
+        for layer in LAYERS if stack == "after" else []:
+            options = {}
+            if layer is ServerSessionMiddleware:
+                options = {"store": store, "secret_key": SECRET,
+                           "skip_paths": (STATIC_URL,)}
+            middleware.append(Middleware(layer, **options))
+        cookie = signer.sign(SID).decode()
+    routes = [Route("/login", login), Route("/client", endpoint)]
+    return Starlette(routes=routes, middleware=middleware), f"session={cookie}"
+
+
+async def request(app: Starlette, path: str, cookie: str = ""):
+    headers = [(b"host", b"bench")]
+    if cookie:
+        headers.append((b"cookie", cookie.encode()))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers,
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+    status = None
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+CASES = {
+    "anonymous": ("/login", False),
+    "logged in": ("/client", True),
+}
+
+
+async def run(stack: str, case: str, count: int) -> float:
+    app, session_cookie = await build(stack)
+    path, logged_in = CASES[case]
+    cookie = session_cookie if logged_in else ""
+
+    status = await request(app, path, cookie)
+    if status != 200:  # e.g. redirected to /login: not the path being measured
+        raise SystemExit(f"❌ {stack} {case}: GET {path} answered {status}")
+    for _ in range(min(count, 500)):  # warm up
+        await request(app, path, cookie)
+    started = time.perf_counter()
+    for _ in range(count):
+        await request(app, path, cookie)
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    for case in CASES:
+        results = {stack: asyncio.run(run(stack, case, count))
+                   for stack in ("bare", "before", "after")}
+        print(f"{case}:")
+        for stack, us in results.items():
+            overhead = us - results["bare"]
+            print(f"  {stack:>7}: {us:8.1f} µs/request  (+{overhead:.1f} µs middleware)")
+
+
+if __name__ == "__main__":
+    main()